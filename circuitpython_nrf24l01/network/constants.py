@@ -54,7 +54,7 @@ NETWORK_POLL = const(194)  #: Primarily for RF24Mesh
 MESH_ADDR_REQUEST = const(195)  #: Primarily for RF24Mesh
 MESH_ADDR_RESPONSE = const(128)  #: Primarily for RF24Mesh
 
-#: Unsupported at this time as this operation requires a new implementation.
+#: Used for external data and streamed messages.
 NETWORK_EXT_DATA = const(131)
 
 # No Network ACK message types
@@ -64,6 +64,18 @@ MESH_ADDR_RELEASE = const(197)
 MESH_ADDR_LOOKUP = const(196)
 #: The `message_type` to request a mesh node's unique ID number from its node address.
 MESH_ID_LOOKUP = const(198)
+#: The `message_type` of a data frame sent with `RF24Network.send_bulk()`.
+NETWORK_BULK_DATA = const(201)
+#: The `message_type` that acknowledges frames received with `RF24Network.recv_bulk()`.
+NETWORK_BULK_ACK = const(202)
+#: The `message_type` of a frame that combines several small messages.
+NETWORK_COALESCED = const(203)
+#: The `message_type` of a frame that the mesh master multicasts when its
+#: `dhcp_dict` changes.
+MESH_ADDR_CHANGE = const(204)
+#: The `message_type` to request the network addresses of several mesh nodes' unique ID
+#: numbers at once.
+MESH_BATCH_LOOKUP = const(205)
 
 
 # fragmented message types (used in the `header.reserved` attribute)
@@ -24,13 +24,19 @@
 import time
 
 try:
-    from typing import Tuple, Union, List, Optional
+    from typing import Tuple, Union, List, Optional, Callable, Any, Dict
 except ImportError:
     pass
 import busio  # type:ignore[import]
 from digitalio import DigitalInOut  # type:ignore[import]
 from ..rf24 import RF24, address_repr
-from .structs import RF24NetworkFrame, FrameQueue, FrameQueueFrag, is_address_valid
+from .structs import (
+    RF24NetworkHeader,
+    RF24NetworkFrame,
+    FrameQueue,
+    FrameQueueFrag,
+    is_address_valid,
+)
 from .constants import (
     MAX_FRAG_SIZE,
     MSG_FRAG_FIRST,
@@ -41,12 +47,17 @@ from .constants import (
     MESH_ADDR_RESPONSE,
     MESH_ADDR_REQUEST,
     NETWORK_ACK,
+    NETWORK_BULK_ACK,
+    NETWORK_BULK_DATA,
+    NETWORK_COALESCED,
     NETWORK_EXT_DATA,
     NETWORK_OVERRUN,
     NETWORK_PING,
     NETWORK_POLL,
     TX_ROUTED,
     NETWORK_MULTICAST_ADDR,
+    NETWORK_MULTICAST_ADDR_LVL_2,
+    NETWORK_MULTICAST_ADDR_LVL_4,
     TX_NORMAL,
     TX_PHYSICAL,
     TX_LOGICAL,
@@ -162,6 +173,31 @@ class RadioMixin:
         self._rf24.print_pipes()
 
 
+class _BufferReader:
+    """A minimal file-like wrapper used to stream a buffer in fragments."""
+
+    def __init__(self, buf: Union[bytes, bytearray, memoryview]):
+        self._buf = memoryview(buf)
+        self._offset = 0
+
+    def readinto(self, buf: bytearray) -> int:
+        """copy the next chunk of the wrapped buffer into ``buf``"""
+        chunk = self._buf[self._offset : self._offset + len(buf)]
+        buf[: len(chunk)] = chunk
+        self._offset += len(chunk)
+        return len(chunk)
+
+
+_MAX_NODE_ENTRIES = 16  # the number of nodes with link/route statistics
+_MAX_MULTICAST_SEEN = 16  # the number of remembered multicast frames
+_TX_PRIORITIES = 3  # the number of priority classes in the outbound queue
+_TX_PRIORITY_RELAY = 1  # the priority of relayed frames deferred by update()
+_ROUTE_CACHE_SIZE = 4096  # covers all 12-bit (4 octal digits) logical addresses
+# each byte of the route cache uses the following bits:
+_ROUTE_VALID = 0x80  # the logical address is valid (route via parent if alone)
+_ROUTE_CHILD = 0x40  # route via the child whose number is in the 3 LSBits
+
+
 def _lvl_2_addr(level: int) -> int:
     """translate decimal tree ``level`` into an octal node address"""
     level_addr = 0
@@ -170,6 +206,10 @@ def _lvl_2_addr(level: int) -> int:
     return level_addr
 
 
+def _ignore_ack(to_node: int, frame_id: int, delivered: bool):
+    """the ``on_ack`` function of queued frames that were given none"""
+
+
 class NetworkMixin(RadioMixin):
     def __init__(
         self,
@@ -181,20 +221,56 @@ class NetworkMixin(RadioMixin):
         super().__init__(spi, csn, ce_pin, spi_frequency=spi_frequency)
         # setup private members
         self._net_lvl, self._addr, self._mask, self._mask_inv = (0,) * 4
+        self._depth = 0  # the node's level in the tree (unlike multicast_level)
+        self._routes = bytearray(0)  # the route cache built by _begin()
         self._relay_enabled, self._frag_enabled = (False, True)
 
         #: The timeout (in milliseconds) to wait for successful transmission.
         self.tx_timeout: int = 25
         #: The timeout (in milliseconds) to wait for transmission's `NETWORK_ACK`.
         self.route_timeout: int = 3 * self.tx_timeout
+        #: Derive the timeouts from the measured round-trip times of each route.
+        self.adaptive_timeouts: bool = True
+        # round-trip time estimates (in microseconds): {node: [srtt, rttvar]}
+        self._route_rtt: Dict[int, List[int]] = {}  # keyed by destination
+        self._link_rtt: Dict[int, List[int]] = {}  # keyed by next hop
+        #: Tune the auto-retry delay & count for each next hop.
+        self.adaptive_retries: bool = True
+        # per next hop: {node: [average ARC (fixed-point * 16), consecutive failures]}
+        self._link_stats: Dict[int, List[int]] = {}
+        self._retry_base = (1500, 5)  # the (ARD, ARC) used for links without issues
+        self._retry_cfg = (1500, 15)  # the (ARD, ARC) currently used by the radio
         #: enable/disable (`True`/`False`) multicasting
         self.allow_multicast: bool = True
         #: Force `update()` to return on system message types.
         self.ret_sys_msg: bool = False
         self._parenthood = True  # can mesh nodes respond to NETWORK_POLL messages?
-        self.max_message_length: int = 144  #: The maximum length of a frame's message.
+        self._max_msg_len = 144
+        self._ext_source: Optional[Any] = None  # the source of a streamed message
         #: The queue (FIFO) of received frames for this node
         self.queue: Union[FrameQueueFrag, FrameQueue] = FrameQueueFrag()
+        self._ext_sink: Optional[Callable[[RF24NetworkFrame], Any]] = None
+        # outstanding NETWORK_ACK messages:
+        # {frame_id: (to_node, timeout, callback, sent_time)}
+        self._pending_acks: Dict[int, Tuple[int, int, Callable[..., Any], int]] = {}
+        #: The maximum number of frames that can await a `NETWORK_ACK` asynchronously.
+        self.max_pending_acks: int = 8
+        self._budget_end: Optional[int] = None  # the deadline of a limited update()
+        # outbound frames for each priority: [(frame, write_direct, send_type, on_ack)]
+        self._tx_queues: List[List[Tuple[bytes, int, int, Any]]] = [
+            [] for _ in range(_TX_PRIORITIES)
+        ]
+        self._tx_last_dest: Optional[int] = None  # the last destination served
+        self._tx_draining = False  # is the outbound queue being sent?
+        # frames to send after a delay: [(due_time, frame, write_direct, send_type)]
+        self._tx_scheduled: List[Tuple[int, bytes, int, int]] = []
+        #: The time (in milliseconds) to ignore duplicates of a received multicast frame.
+        self.multicast_ttl: int = 1000
+        self._multicast_seen: Dict[bytes, int] = {}  # {header: expiration_time}
+        #: The maximum number of frames that the outbound queue can hold.
+        self.max_tx_queue: int = 8
+        #: The number of frames that the outbound queue has dropped.
+        self.tx_dropped: int = 0
         #: A buffer containing the last frame handled by the network node
         self.frame_buf = RF24NetworkFrame()
         self.address_suffix = bytearray([0xC3, 0x3C, 0x33, 0xCE, 0x3E, 0xE3])
@@ -208,7 +284,7 @@ class NetworkMixin(RadioMixin):
         # prep radio
         self._rf24.listen = False
         self._rf24.auto_ack = 0x3E
-        self._rf24.set_auto_retries(250 * (((n_addr % 6) + 1) * 2 + 3) + 250, 5)
+        self.set_auto_retries(250 * (((n_addr % 6) + 1) * 2 + 3) + 250, 5)
         for i in range(6):
             self._rf24.open_rx_pipe(i, self._pipe_address(n_addr, i))
         self._rf24.listen = True
@@ -216,12 +292,13 @@ class NetworkMixin(RadioMixin):
         # setup address-related instance attributes
         self._addr = n_addr
         self._mask = 0
-        self._net_lvl = 0
+        self._depth = 0
         # calc inverted address mask
         mask = 0xFFFF
         while self._addr & mask:
             mask = (mask << 3) & 0xFFFF
-            self._net_lvl += 1
+            self._depth += 1
+        self._net_lvl = self._depth
         self._mask_inv = mask
         # calc address mask
         while not mask & 7:
@@ -234,6 +311,41 @@ class NetworkMixin(RadioMixin):
         while mask:
             mask >>= 3
             self._parent_pipe >>= 3
+        self._build_routes()
+
+    def _build_routes(self):
+        """cache the validity & next hop of all 12-bit logical addresses"""
+        if len(self._routes) != _ROUTE_CACHE_SIZE:
+            self._routes = bytearray(_ROUTE_CACHE_SIZE)
+        # invalid addresses are never written, so their entries always remain 0
+        for addr in (
+            NETWORK_MULTICAST_ADDR,
+            NETWORK_MULTICAST_ADDR_LVL_2,
+            NETWORK_MULTICAST_ADDR_LVL_4,
+            0,
+        ):
+            self._routes[addr] = self._route(addr)
+        level, shift = ([0], 0)
+        while shift < 12:
+            children = []
+            for parent in level:
+                for digit in range(1, 6):
+                    child = parent | digit << shift
+                    self._routes[child] = self._route(child)
+                    children.append(child)
+            level, shift = (children, shift + 3)
+
+    def _route(self, to_node: int) -> int:
+        """calculate the route cache entry for a valid logical address"""
+        if to_node & self._mask != self._addr:
+            return _ROUTE_VALID
+        return _ROUTE_VALID | _ROUTE_CHILD | (to_node >> (self._depth * 3)) & 7
+
+    def _is_address_valid(self, address: int) -> bool:
+        """a faster `is_address_valid()` using the route cache"""
+        if address < len(self._routes):
+            return bool(self._routes[address])
+        return is_address_valid(address)
 
     def print_details(self, dump_pipes: bool = False, network_only: bool = False):
         if not network_only:
@@ -282,13 +394,130 @@ class NetworkMixin(RadioMixin):
     def fragmentation(self, enabled: bool):
         enabled = bool(enabled)
         if enabled != self._frag_enabled:
-            self.max_message_length = 144 if enabled else MAX_FRAG_SIZE
+            self._max_msg_len = 144 if enabled else MAX_FRAG_SIZE
             if enabled:
-                self.queue = FrameQueueFrag(self.queue)
+                self.queue = FrameQueueFrag(self.queue, self._max_msg_len)
+                self.queue.ext_data_sink = self._ext_sink
             else:
                 self.queue = FrameQueue(self.queue)
             self._frag_enabled = enabled
 
+    @property
+    def max_message_length(self) -> int:
+        """The maximum length of a frame's message."""
+        return self._max_msg_len
+
+    @max_message_length.setter
+    def max_message_length(self, length: int):
+        # a fragmented message's sequence is counted with 1 byte
+        if not 0 < length <= MAX_FRAG_SIZE * 255:
+            raise ValueError(
+                "max_message_length must be in range [1, {}]".format(
+                    MAX_FRAG_SIZE * 255
+                )
+            )
+        self._max_msg_len = length
+        if isinstance(self.queue, FrameQueueFrag):
+            self.queue.max_message_length = length
+
+    @property
+    def ext_data_sink(self) -> Optional[Callable[[RF24NetworkFrame], Any]]:
+        """A function that handles each received fragment of a streamed
+        `NETWORK_EXT_DATA` message."""
+        return self._ext_sink
+
+    @ext_data_sink.setter
+    def ext_data_sink(self, sink: Optional[Callable[[RF24NetworkFrame], Any]]):
+        self._ext_sink = sink
+        if isinstance(self.queue, FrameQueueFrag):
+            self.queue.ext_data_sink = sink
+
+    @property
+    def pending_acks(self) -> int:
+        """The number of transmitted frames awaiting a `NETWORK_ACK` (read-only)."""
+        return len(self._pending_acks)
+
+    def _expire_acks(self):
+        """report frames that did not get a NETWORK_ACK in time as undelivered"""
+        now = time.monotonic_ns()
+        for frame_id, pending in list(self._pending_acks.items()):
+            if now > pending[1]:
+                del self._pending_acks[frame_id]
+                self._rtt_sample(
+                    self._route_rtt, pending[0], (pending[1] - pending[3]) // 1000
+                )
+                pending[2](pending[0], frame_id, False)
+
+    def get_auto_retries(self, node_address: Optional[int] = None) -> tuple:
+        if node_address is None:
+            return super().get_auto_retries()
+        return self._link_retries(node_address)
+
+    def set_auto_retries(self, delay: int, count: int):
+        super().set_auto_retries(delay, count)
+        self._retry_base = self._rf24.get_auto_retries()
+        self._retry_cfg = self._retry_base
+
+    def get_link_stats(self, node_address: int) -> Optional[Tuple[float, int]]:
+        """Get the average auto-retry count & consecutive failures of a link."""
+        stats = self._link_stats.get(node_address)
+        if stats is None:
+            return None
+        return (stats[0] / 16, stats[1])
+
+    def _link_retries(self, to_node: int) -> Tuple[int, int]:
+        """pick the auto-retry delay & count to use for a next hop"""
+        ard, arc = self._retry_base
+        stats = self._link_stats.get(to_node)
+        if stats is not None and self.adaptive_retries:
+            retries = (stats[0] + 8) >> 4  # rounded average ARC
+            # wait longer between attempts on links that suffer collisions or failures
+            ard = min(ard + 250 * (retries + stats[1]), 4000)
+            arc = min(arc + retries, 15)
+        if ard < 500 and (self._rf24.data_rate == 250 or self._rf24.ack):
+            ard = 500  # ACK packets with payloads (or at 250 kbps) need 500 us or more
+        return (ard, arc)
+
+    def _link_record(self, to_node: int, result: bool):
+        """record the auto-retry count & outcome of a transmission to a next hop"""
+        stats = self._link_stats.get(to_node)
+        if stats is None:
+            if len(self._link_stats) >= _MAX_NODE_ENTRIES:
+                del self._link_stats[next(iter(self._link_stats))]
+            stats = [0, 0]
+            self._link_stats[to_node] = stats
+        stats[0] += (self._rf24.last_tx_arc * 16 - stats[0]) >> 2
+        stats[1] = 0 if result else min(stats[1] + 1, 15)
+
+    def get_rtt(
+        self, node_address: int, routed: bool = True
+    ) -> Optional[Tuple[float, float]]:
+        """Get the smoothed round-trip time & its variation (in milliseconds)."""
+        est = (self._route_rtt if routed else self._link_rtt).get(node_address)
+        if est is None:
+            return None
+        return (est[0] / 1000, est[1] / 1000)
+
+    @staticmethod
+    def _rtt_sample(table: Dict[int, List[int]], node: int, sample: int):
+        """feed a round-trip time (in microseconds) to a node's estimate"""
+        est = table.get(node)
+        if est is None:
+            if len(table) >= _MAX_NODE_ENTRIES:
+                del table[next(iter(table))]
+            table[node] = [sample, sample >> 1]
+        else:  # RTTVAR uses a gain of 1/4 and SRTT uses a gain of 1/8
+            est[1] += (abs(est[0] - sample) - est[1]) >> 2
+            est[0] += (sample - est[0]) >> 3
+
+    def _timeout(self, table: Dict[int, List[int]], node: int, default: int) -> int:
+        """get a timeout (in milliseconds) derived from a node's estimate"""
+        est = table.get(node)
+        if est is None or not self.adaptive_timeouts:
+            return default
+        # SRTT + 4 * RTTVAR (rounded up to the nearest millisecond)
+        return min(max(-(-(est[0] + 4 * est[1]) // 1000), 1), default * 4)
+
     @property
     def multicast_relay(self) -> bool:
         """Enabling this attribute will automatically forward received multicasted
@@ -338,21 +567,46 @@ class NetworkMixin(RadioMixin):
         # print(oct(node_addr), "for pipe", pipe_number, "is", address_repr(result))
         return result
 
-    def _net_update(self) -> int:
+    def _net_update(
+        self, max_frames: Optional[int] = None, max_time_us: Optional[int] = None
+    ) -> int:
         """keep the network layer current; returns the received message type"""
+        timeout = time.monotonic_ns()
+        timeout += 100000000 if max_time_us is None else max_time_us * 1000
+        budget_end = self._budget_end  # this may be a nested call
+        if max_time_us is not None:
+            self._budget_end = timeout
+        try:
+            return self._net_process(max_frames, timeout)
+        finally:
+            self._budget_end = budget_end
+
+    def _net_process(self, max_frames: Optional[int], timeout: int) -> int:
+        """handle deferred & received frames until the limits are reached"""
         ret_val = 0  # sentinel indicating there is nothing to report
-        timeout = time.monotonic_ns() + 100000000
+        if self._pending_acks:
+            self._expire_acks()
+        drained = True
+        if (self._tx_scheduled or self.tx_queue_depth) and not self._tx_draining:
+            # a stalled outbound queue must not keep received frames from being read
+            drained = self._send_queued(progress=True)
+        frames = 0
         while True:
-            if time.monotonic_ns() > timeout:
+            if self._tx_scheduled and not self._tx_draining:
+                self._send_queued(due_only=True)  # keep delayed frames on time
+            if frames and time.monotonic_ns() > timeout:
                 return NETWORK_OVERRUN
+            if max_frames is not None and frames >= max_frames:
+                return ret_val
             temp_buf = self._rf24.read()
             if temp_buf is None:
-                return ret_val
+                return ret_val or (0 if drained else NETWORK_OVERRUN)
+            frames += 1
             if not self.frame_buf.unpack(temp_buf):
                 return NETWORK_CORRUPTION
-            if not is_address_valid(
+            if not self._is_address_valid(
                 self.frame_buf.header.to_node
-            ) or not is_address_valid(self.frame_buf.header.from_node):
+            ) or not self._is_address_valid(self.frame_buf.header.from_node):
                 # print("discarding frame due to invalid network addresses.")
                 continue
 
@@ -373,20 +627,157 @@ class NetworkMixin(RadioMixin):
             if not keep_updating:
                 return ret_val
 
+    def _within_budget(self, write_direct: int, send_type: int) -> bool:
+        """can a frame be relayed before the deadline of a limited update()?"""
+        if self._budget_end is None:
+            return True
+        next_hop = self._logical_2_physical(write_direct, send_type)[0]
+        cost = self._timeout(self._link_rtt, next_hop, self.tx_timeout) * 1000000
+        return time.monotonic_ns() + cost <= self._budget_end
+
+    def _awaits_net_ack(self, buf: bytes, write_direct: int, send_type: int) -> bool:
+        """would transmitting a packed frame wait for a `NETWORK_ACK` message?"""
+        return (
+            send_type in (TX_NORMAL, TX_LOGICAL)
+            and 64 < buf[6] < 192
+            and self._logical_2_physical(write_direct, send_type)[0] != write_direct
+        )
+
+    def _forward(self, write_direct: int, send_type: int, delay: float = 0) -> bool:
+        """relay the frame_buf now, after a ``delay`` (in seconds), or later"""
+        if (
+            send_type == TX_ROUTED
+            and self.frame_buf.is_ack_type()
+            and self._logical_2_physical(write_direct, send_type)[0] == write_direct
+        ):
+            delay = 0.002  # the last hop of a frame that invokes a NETWORK_ACK
+        if delay:
+            return self._schedule(delay, write_direct, send_type)
+        if self.tx_queue_depth or not self._within_budget(write_direct, send_type):
+            return self._enqueue_tx(write_direct, send_type, _TX_PRIORITY_RELAY)
+        return self._write(write_direct, send_type)
+
+    def _schedule(self, delay: float, write_direct: int, send_type: int) -> bool:
+        """send the frame_buf during update() after a ``delay`` (in seconds)"""
+        if len(self._tx_scheduled) >= self.max_tx_queue:
+            self.tx_dropped += 1
+            return False
+        due = time.monotonic_ns() + int(delay * 1000000000)
+        self._tx_scheduled.append((due, self.frame_buf.pack(), write_direct, send_type))
+        return True
+
+    @property
+    def tx_queue_depth(self) -> int:
+        """The number of frames in the outbound queue (read-only)."""
+        return sum(len(queue) for queue in self._tx_queues)
+
+    def _enqueue_tx(
+        self,
+        write_direct: int,
+        send_type: int,
+        priority: int,
+        on_ack: Optional[Callable[[int, int, bool], Any]] = None,
+    ) -> bool:
+        """put the frame_buf in the outbound queue; returns False if dropped"""
+        if self.tx_queue_depth >= self.max_tx_queue:
+            # make room by dropping the newest frame of the lowest (lower) priority
+            for lower in range(_TX_PRIORITIES - 1, priority, -1):
+                if self._tx_queues[lower]:
+                    self._drop_tx(self._tx_queues[lower].pop())
+                    break
+            else:
+                self.tx_dropped += 1
+                if on_ack is not None:
+                    header = self.frame_buf.header
+                    on_ack(header.to_node, header.frame_id, False)
+                return False
+        self._tx_queues[priority].append(
+            (self.frame_buf.pack(), write_direct, send_type, on_ack)
+        )
+        return True
+
+    def _drop_tx(self, entry: Tuple[bytes, int, int, Any]):
+        """discard a frame from the outbound queue"""
+        self.tx_dropped += 1
+        if entry[3] is not None:
+            header = RF24NetworkHeader()
+            header.unpack(entry[0])
+            entry[3](header.to_node, header.frame_id, False)
+
+    def _send_queued(self, due_only: bool = False, progress: bool = False) -> bool:
+        """send due & queued frames; returns False if there was not enough time.
+        If ``progress`` is True, the first frame is sent regardless of the budget."""
+        self._tx_draining = True
+        try:
+            now, index = (time.monotonic_ns(), 0)
+            while index < len(self._tx_scheduled):
+                due, buf, write_direct, send_type = self._tx_scheduled[index]
+                if due > now:
+                    index += 1
+                    continue
+                if not progress and not self._within_budget(write_direct, send_type):
+                    return False
+                progress = False
+                self._tx_scheduled.pop(index)
+                self.frame_buf.unpack(buf)
+                self._write(write_direct, send_type)
+            if due_only:
+                return True
+            for queue in self._tx_queues:
+                while queue:
+                    # serve a different destination than last time (if any)
+                    index = 0
+                    for i, entry in enumerate(queue):
+                        if entry[1] != self._tx_last_dest:
+                            index = i
+                            break
+                    buf, write_direct, send_type, on_ack = queue[index]
+                    if self._awaits_net_ack(buf, write_direct, send_type) and (
+                        len(self._pending_acks) >= self.max_pending_acks
+                    ):
+                        return False  # hold it until a NETWORK_ACK is resolved
+                    if not progress and not self._within_budget(
+                        write_direct, send_type
+                    ):
+                        return False
+                    progress = False
+                    queue.pop(index)
+                    self._tx_last_dest = write_direct
+                    self.frame_buf.unpack(buf)
+                    # never wait for a NETWORK_ACK here; let _net_update() resolve it
+                    self._write(write_direct, send_type, on_ack or _ignore_ack)
+            return True
+        finally:
+            self._tx_draining = False
+
     def _handle_frame_for_this_node(self, msg_t: int) -> Tuple[bool, int]:
         """Returns False if the frame is not consumed or True if consumed"""
         if msg_t == NETWORK_PING:
             return (True, msg_t)
+        if msg_t == NETWORK_ACK and self._pending_acks:
+            pending = self._pending_acks.pop(self.frame_buf.header.frame_id, None)
+            if pending is not None:
+                self._rtt_sample(
+                    self._route_rtt,
+                    pending[0],
+                    (time.monotonic_ns() - pending[3]) // 1000,
+                )
+                pending[2](pending[0], self.frame_buf.header.frame_id, True)
+                return (True, msg_t)
 
         if msg_t == MESH_ADDR_RESPONSE and NETWORK_DEFAULT_ADDR != self._addr:
             self.frame_buf.header.to_node = NETWORK_DEFAULT_ADDR
-            self._write(NETWORK_DEFAULT_ADDR, TX_PHYSICAL)
+            self._forward(NETWORK_DEFAULT_ADDR, TX_PHYSICAL)
             return (True, msg_t)
         if msg_t == MESH_ADDR_REQUEST and self._addr:
             self.frame_buf.header.from_node = self._addr
             self.frame_buf.header.to_node = 0
-            self._write(0, TX_NORMAL)
+            self._forward(0, TX_NORMAL)
             return (True, msg_t)
+        if msg_t in (NETWORK_BULK_DATA, NETWORK_BULK_ACK):
+            return (False, msg_t)  # handled by send_bulk() or recv_bulk()
+        if msg_t == NETWORK_COALESCED:
+            return (True, self._unpack_coalesced())
         if self.ret_sys_msg and msg_t > MAX_USR_DEF_MSG_TYPE or msg_t == NETWORK_ACK:
             # print("Received system payload type", msg_t)
             if msg_t not in (
@@ -404,6 +795,55 @@ class NetworkMixin(RadioMixin):
             return (False, NETWORK_EXT_DATA)
         return (True, msg_t)
 
+    def _unpack_coalesced(self) -> int:
+        """enqueue the messages combined in the frame_buf; returns the last type"""
+        buf, header = (self.frame_buf.message, self.frame_buf.header)
+        frame_id, offset, msg_t = (header.frame_id, 0, 0)
+        while offset + 2 <= len(buf):
+            end = offset + 2 + buf[offset + 1]
+            if end > len(buf) or buf[offset] > MAX_USR_DEF_MSG_TYPE:
+                break  # malformed
+            # each message is identified by the frame's frame_id + the message's index
+            header.message_type = buf[offset]
+            self.queue.enqueue(RF24NetworkFrame(header, buf[offset + 2 : end]))
+            header.frame_id = (header.frame_id + 1) & 0xFFFF
+            msg_t, offset = (buf[offset], end)
+        header.frame_id = frame_id
+        return msg_t
+
+    def _is_multicast_duplicate(self) -> bool:
+        """remember the received multicast frame; returns True if recently seen"""
+        if not self.multicast_ttl or self.frame_buf.header.from_node == (
+            NETWORK_DEFAULT_ADDR  # shared by all nodes waiting for a mesh address
+        ):
+            return False
+        now, key = (time.monotonic_ns(), self.frame_buf.header.pack())
+        expiration = self._multicast_seen.get(key)
+        if expiration is not None and expiration > now:
+            return True
+        if len(self._multicast_seen) >= _MAX_MULTICAST_SEEN:
+            for seen, expiration in list(self._multicast_seen.items()):
+                if expiration <= now:
+                    del self._multicast_seen[seen]
+            if len(self._multicast_seen) >= _MAX_MULTICAST_SEEN:
+                del self._multicast_seen[next(iter(self._multicast_seen))]
+        self._multicast_seen[key] = now + self.multicast_ttl * 1000000
+        return False
+
+    def _relay_multicast(self):
+        """forward the received multicast frame to the next network level"""
+        # print(
+        #     "Forwarding multicast frame from {} to {}".format(
+        #         oct(self.frame_buf.header.from_node),
+        #         oct(self.frame_buf.header.to_node),
+        #     ),
+        # )
+        self._forward(
+            (_lvl_2_addr(self._net_lvl) << 3) & 0xFFFF,
+            TX_MULTICAST,
+            (0 if self._addr >> 3 else 0.0024) + (self._addr % 4) * 0.0006,
+        )
+
     def _handle_frame_for_other_node(self, msg_t: int) -> Tuple[bool, int]:
         """Returns False if the frame is not consumed or True if consumed"""
         if self.allow_multicast:
@@ -415,34 +855,27 @@ class NetworkMixin(RadioMixin):
                                 self.frame_buf.header.from_node
                             )
                             self.frame_buf.header.from_node = self._addr
-                            time.sleep(self._parent_pipe / 1000)
-                            self._write(self.frame_buf.header.to_node, TX_PHYSICAL)
+                            self._forward(
+                                self.frame_buf.header.to_node,
+                                TX_PHYSICAL,
+                                self._parent_pipe / 1000,
+                            )
                         return (True, 0)
+                if self._is_multicast_duplicate():
+                    return (True, 0)
                 self.queue.enqueue(self.frame_buf)
                 if self.multicast_relay:
-                    # print(
-                    #     "Forwarding multicast frame from {} to {}".format(
-                    #         oct(self.frame_buf.header.from_node),
-                    #         oct(self.frame_buf.header.to_node),
-                    #     ),
-                    # )
-                    if not self._addr >> 3:
-                        time.sleep(0.0024)
-                    time.sleep((self._addr % 4) * 0.0006)
-                    self._write(
-                        (_lvl_2_addr(self._net_lvl) << 3) & 0xFFFF,
-                        TX_MULTICAST,
-                    )
+                    self._relay_multicast()
                 if self.frame_buf.header.message_type == NETWORK_EXT_DATA:
                     # enqueue() will adjust this for the last fragment
                     return (False, NETWORK_EXT_DATA)
             elif self._addr != NETWORK_DEFAULT_ADDR:
                 # pass it along
-                self._write(self.frame_buf.header.to_node, TX_ROUTED)
+                self._forward(self.frame_buf.header.to_node, TX_ROUTED)
                 return (True, 0)
         elif self._addr != NETWORK_DEFAULT_ADDR:  # multicast not enabled
             # pass it along
-            self._write(self.frame_buf.header.to_node, TX_ROUTED)
+            self._forward(self.frame_buf.header.to_node, TX_ROUTED)
             msg_t = 0
         return (True, msg_t)
 
@@ -484,18 +917,22 @@ class NetworkMixin(RadioMixin):
             return False
         return True
 
-    def _write(self, write_direct: int, send_type: int) -> bool:
+    def _write(
+        self,
+        write_direct: int,
+        send_type: int,
+        on_ack: Optional[Callable[[int, int, bool], Any]] = None,
+    ) -> bool:
         """entry point for transmitting the current frame_buf"""
         is_ack_t = self.frame_buf.is_ack_type()
+        frame_id, dest = (self.frame_buf.header.frame_id, self.frame_buf.header.to_node)
 
         to_node, to_pipe, is_multicast = self._logical_2_physical(
             write_direct, send_type
         )
 
-        if send_type == TX_ROUTED and write_direct == to_node and is_ack_t:
-            time.sleep(0.002)
-
         # send the frame
+        sent_time = time.monotonic_ns()
         result = self._write_to_pipe(to_node, to_pipe, is_multicast)
         # print("Failed to send" if not result else "Successfully sent")
 
@@ -525,11 +962,37 @@ class NetworkMixin(RadioMixin):
             elif to_node != write_direct and send_type in (TX_NORMAL, TX_LOGICAL):
                 self._rf24.listen = True
                 self._rf24.auto_ack = 0x3E
-                rx_timeout = self.route_timeout * 1000000 + time.monotonic_ns()
-                while self._net_update() != NETWORK_ACK:
-                    if time.monotonic_ns() > rx_timeout:
+                rx_timeout = (
+                    self._timeout(self._route_rtt, dest, self.route_timeout) * 1000000
+                    + sent_time
+                )
+                if on_ack is not None and (
+                    len(self._pending_acks) < self.max_pending_acks
+                ):
+                    # let _net_update() resolve the NETWORK_ACK message later
+                    pending = self._pending_acks.pop(frame_id, None)
+                    if pending is not None:  # frame_id was reused
+                        pending[2](pending[0], frame_id, False)
+                    self._pending_acks[frame_id] = (dest, rx_timeout, on_ack, sent_time)
+                    return result
+                wait_end = rx_timeout
+                if self._budget_end is not None:  # don't outlast a limited update()
+                    wait_end = min(rx_timeout, self._budget_end)
+                while (
+                    self._net_update() != NETWORK_ACK
+                    or self.frame_buf.header.frame_id != frame_id
+                ):
+                    if time.monotonic_ns() > wait_end:
                         result = False
                         break
+                if result or wait_end == rx_timeout:  # a cut short wait isn't an RTT
+                    self._rtt_sample(
+                        self._route_rtt,
+                        dest,
+                        (min(time.monotonic_ns(), rx_timeout) - sent_time) // 1000,
+                    )
+                if on_ack is not None:
+                    on_ack(dest, frame_id, bool(result))
                 # print(
                 #     "Network ACK {}received from {}".format(
                 #         "" if result else "not ", oct(to_node)
@@ -541,21 +1004,38 @@ class NetworkMixin(RadioMixin):
         self._rf24.listen = True
         if not is_multicast:
             self._rf24.auto_ack = 0x3E
+        if on_ack is not None:  # there is no NETWORK_ACK to wait for
+            on_ack(dest, frame_id, bool(result))
         return result
 
     def _write_to_pipe(self, to_node: int, to_pipe: int, is_multicast: bool) -> bool:
         """send prepared frame to a particular node's pipe"""
         result: Union[bool, bytearray, List[Union[bool, bytearray]]] = False
+        source, self._ext_source = (self._ext_source, None)
         if to_node == self._addr:
             return self.queue.enqueue(self.frame_buf)
         self._rf24.auto_ack = 0x3E + (not is_multicast)
         self.listen = False
         # print("Sending", self.frame_buf.header.to_string(), "to pipe", to_pipe)
         self._rf24.open_tx_pipe(self._pipe_address(to_node, to_pipe))
-        if len(self.frame_buf.message) <= MAX_FRAG_SIZE:
+        if not is_multicast:
+            retries = self._link_retries(to_node)
+            if retries != self._retry_cfg:
+                self._rf24.set_auto_retries(*retries)
+                self._retry_cfg = retries
+        if source is not None:
+            result = self._write_stream(source, to_node)
+        elif len(self.frame_buf.message) <= MAX_FRAG_SIZE:
+            sent_time = time.monotonic_ns()
             result = self._rf24.send(self.frame_buf.pack(), send_only=True)
             if not result:
-                result = self._tx_standby(self.tx_timeout)
+                result = self._tx_standby(
+                    self._timeout(self._link_rtt, to_node, self.tx_timeout)
+                )
+            if not is_multicast:
+                self._rtt_sample(
+                    self._link_rtt, to_node, (time.monotonic_ns() - sent_time) // 1000
+                )
         else:
             # break message into fragments and send the multiple resulting frames
             msg_len = len(self.frame_buf.message)
@@ -574,16 +1054,9 @@ class NetworkMixin(RadioMixin):
                 else:
                     self.frame_buf.header.message_type = MSG_FRAG_MORE
 
-                result = self._rf24.send(
-                    self.frame_buf.header.pack()
-                    + self.frame_buf.message[buf_start:buf_end],
-                    send_only=True,
+                result = self._write_frag(
+                    self.frame_buf.message[buf_start:buf_end], to_node
                 )
-                retries = 3
-                while not result and retries:
-                    time.sleep(0.002)
-                    result = self._tx_standby(self.tx_timeout)
-                    retries -= 1
                 # print(
                 #     "Frag", count + 1, "of", total,
                 #     "sent successfully" if result else "failed to send. Aborting"
@@ -591,11 +1064,65 @@ class NetworkMixin(RadioMixin):
                 if not result:
                     break
             self.frame_buf.header.message_type = msg_t
+        if not is_multicast:
+            self._link_record(to_node, bool(result))
         return result  # type: ignore
 
+    def _write_frag(
+        self, fragment: Union[bytes, bytearray, memoryview], to_node: int
+    ) -> bool:
+        """send a single fragment using the current frame_buf header"""
+        result = self._rf24.send(
+            self.frame_buf.header.pack() + bytes(fragment), send_only=True
+        )
+        retries = 3
+        while not result and retries:
+            if (
+                self._budget_end is not None
+                and time.monotonic_ns() + 2000000 > self._budget_end
+            ):
+                break  # don't outlast a limited update()
+            time.sleep(0.002)
+            result = self._tx_standby(
+                self._timeout(self._link_rtt, to_node, self.tx_timeout)
+            )
+            retries -= 1
+        return bool(result)
+
+    def _write_stream(self, source: Any, to_node: int) -> bool:
+        """send fragments read from a ``source`` with fixed memory usage"""
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            source = _BufferReader(source)
+        bufs = (bytearray(MAX_FRAG_SIZE), bytearray(MAX_FRAG_SIZE))
+        msg_t = self.frame_buf.header.message_type
+        length, count, result = (source.readinto(bufs[0]) or 0, 0, False)
+        while True:
+            next_len = 0
+            if length:
+                next_len = source.readinto(bufs[(count + 1) & 1]) or 0
+            # a 0 fragment count on the first fragment flags a streamed message
+            if not count:
+                self.frame_buf.header.message_type = MSG_FRAG_FIRST
+                self.frame_buf.header.reserved = 0
+            elif not next_len:
+                self.frame_buf.header.message_type = MSG_FRAG_LAST
+                self.frame_buf.header.reserved = msg_t
+            else:
+                self.frame_buf.header.message_type = MSG_FRAG_MORE
+                self.frame_buf.header.reserved = -count & 0xFF
+            result = self._write_frag(memoryview(bufs[count & 1])[:length], to_node)
+            if not result or self.frame_buf.header.message_type == MSG_FRAG_LAST:
+                break
+            count += 1
+            length = next_len
+        self.frame_buf.header.message_type = msg_t
+        return result
+
     def _tx_standby(self, delta_time: int) -> bool:
         result = False
         timeout = delta_time * 1000000 + time.monotonic_ns()
+        if self._budget_end is not None:
+            timeout = min(timeout, self._budget_end)
         while not result and time.monotonic_ns() < timeout:
             result = self._rf24.resend(send_only=True)
         return result
@@ -604,13 +1131,13 @@ class NetworkMixin(RadioMixin):
         self, to_node: int, send_type: int, is_multicast: bool = False
     ) -> Tuple[int, int, bool]:
         """translate msg route into node address, pipe number, & multicast flag."""
-        conv_to_node, conv_to_pipe = (self._parent, self._parent_pipe)
         if send_type > TX_ROUTED:
-            is_multicast, conv_to_pipe, conv_to_node = (True, 0, to_node)
-        elif to_node & self._mask == self._addr:  # to_node is a descendant
-            conv_to_pipe = 5
-            if not to_node & (self._mask_inv << 3):
-                conv_to_node = to_node  # to_node is a direct child
-            else:  # to_node is a descendant of a descendant
-                conv_to_node = to_node & ((self._mask << 3) | 7)
-        return (conv_to_node, conv_to_pipe, is_multicast)
+            return (to_node, 0, True)
+        route = 0
+        if to_node < len(self._routes):
+            route = self._routes[to_node]
+        if not route:  # not in the route cache
+            route = self._route(to_node)
+        if route & _ROUTE_CHILD:  # to_node is a descendant (or this node)
+            return (self._addr | (route & 7) << (self._depth * 3), 5, is_multicast)
+        return (self._parent, self._parent_pipe, is_multicast)
@@ -23,11 +23,18 @@
 transactions."""
 
 import struct
+import time
+from array import array
 
 try:
-    from typing import Union, Optional, List
+    from typing import Union, Optional, List, Callable, Any, Dict, Tuple, Iterator
 except ImportError:
     pass
+try:
+    import mmap
+except ImportError:  # not available on CircuitPython or MicroPython
+    mmap = None  # type: ignore[assignment]
+from micropython import const
 from .constants import (
     NETWORK_EXT_DATA,
     NETWORK_MULTICAST_ADDR,
@@ -36,8 +43,57 @@ from .constants import (
     MSG_FRAG_FIRST,
     MSG_FRAG_MORE,
     MSG_FRAG_LAST,
+    NETWORK_DEFAULT_ADDR,
 )
 
+_UNASSIGNED = const(0xFFFF)  # an address slot in DhcpTable that is not assigned
+_MAP_MAGIC = b"DHCM"  # followed by the mapped file's version (2 bytes) & 2 unused bytes
+_MAP_VERSION = const(1)
+_MAP_SIZE = const(8 + 256 * 2 + 256 * 4)  # header, addresses, & last seen times
+# the highest set bit for every 6-bit mask of child slots
+_HIGHEST_BIT = bytes([0, 0] + [1] * 2 + [2] * 4 + [3] * 8 + [4] * 16 + [5] * 32)
+
+
+def _split_address(address: int) -> Tuple[int, int, int]:
+    """Get the parent, child slot, and the slot's bit shift of an address."""
+    shift = 0
+    while address >> shift > 7:
+        shift += 3
+    return (address & ((1 << shift) - 1), address >> shift, shift)
+
+
+def _heap_push(heap: List[Tuple[int, int]], item: Tuple[int, int]):
+    """Add an item to a binary min-heap."""
+    heap.append(item)
+    i = len(heap) - 1
+    while i:
+        parent = (i - 1) >> 1
+        if heap[parent] <= item:
+            break
+        heap[i] = heap[parent]
+        i = parent
+    heap[i] = item
+
+
+def _heap_pop(heap: List[Tuple[int, int]]) -> Tuple[int, int]:
+    """Remove and return the smallest item from a binary min-heap."""
+    result = heap[0]
+    item = heap.pop()
+    if heap:
+        i, size = (0, len(heap))
+        while True:
+            child = 2 * i + 1
+            if child >= size:
+                break
+            if child + 1 < size and heap[child + 1] < heap[child]:
+                child += 1
+            if item <= heap[child]:
+                break
+            heap[i] = heap[child]
+            i = child
+        heap[i] = item
+    return result
+
 
 def is_address_valid(address: Optional[int]) -> bool:
     """Test if a given address is a valid :ref:`Logical Address <Logical Address>`."""
@@ -207,39 +263,435 @@ class FrameQueue:
         return len(self._queue)
 
 
+class _FragSlot:
+    """A preallocated buffer used to reassemble a single fragmented message."""
+
+    def __init__(self, size: int):
+        self.header = RF24NetworkHeader()
+        self.buf = bytearray(size)
+        self.length = 0  # number of bytes currently stored in `buf`
+        self.stamp = 0  # timestamp (in nanoseconds) of the last received fragment
+        self.active = False
+        self.streaming = False  # fragments are passed to a sink instead of `buf`
+
+    def release(self):
+        """Mark this slot as unused (the buffer is kept for reuse)."""
+        self.active = False
+        self.streaming = False
+        self.length = 0
+
+
 class FrameQueueFrag(FrameQueue):
     """A specialized `FrameQueue` with an additional cache for fragmented frames."""
 
-    def __init__(self, queue: Optional[Union["FrameQueue", "FrameQueueFrag"]] = None):
+    def __init__(
+        self,
+        queue: Optional[Union["FrameQueue", "FrameQueueFrag"]] = None,
+        max_message_length: int = 144,
+    ):
         super().__init__(queue)
-        self._frags = RF24NetworkFrame()  # initialize cache
+        #: The time (in milliseconds) an incomplete fragmented message is cached.
+        self.frag_timeout: int = 250
+        #: A function that is passed each fragment of a streamed `NETWORK_EXT_DATA`
+        #: message (instead of reassembling the message in memory).
+        self.ext_data_sink: Optional[Callable[[RF24NetworkFrame], Any]] = None
+        self._max_msg_len = max_message_length
+        self._slots: List[_FragSlot] = []
+        streams = 3
+        if isinstance(queue, FrameQueueFrag):
+            self.frag_timeout = queue.frag_timeout
+            self.ext_data_sink = queue.ext_data_sink
+            streams = queue.max_frag_streams
+        self.max_frag_streams = streams  # initialize cache
+
+    @property
+    def max_message_length(self) -> int:
+        """The size (in bytes) of each buffer used to reassemble a message."""
+        return self._max_msg_len
+
+    @max_message_length.setter
+    def max_message_length(self, length: int):
+        if length != self._max_msg_len:
+            self._max_msg_len = length
+            self.max_frag_streams = len(self._slots)  # reallocate cache
+
+    @property
+    def max_frag_streams(self) -> int:
+        """The maximum number of fragmented messages that can be reassembled
+        concurrently. Defaults to 3."""
+        return len(self._slots)
+
+    @max_frag_streams.setter
+    def max_frag_streams(self, count: int):
+        self._slots = [_FragSlot(self._max_msg_len) for _ in range(max(1, count))]
+
+    def _find_slot(self, frame: RF24NetworkFrame) -> Optional[_FragSlot]:
+        """Get the cache slot reassembling the ``frame``'s message (if any)."""
+        for slot in self._slots:
+            if (
+                slot.active
+                and slot.header.from_node == frame.header.from_node
+                and slot.header.frame_id == frame.header.frame_id
+            ):
+                return slot
+        return None
+
+    def _claim_slot(self, frame: RF24NetworkFrame, now: int) -> _FragSlot:
+        """Get a cache slot for a new fragmented message, evicting the stalest
+        message if all slots are occupied."""
+        result = self._find_slot(frame)
+        if result is not None:
+            return result  # restart a message that was re-sent
+        timeout = self.frag_timeout * 1000000
+        for slot in self._slots:
+            if not slot.active or now - slot.stamp > timeout:
+                return slot
+            if result is None or slot.stamp < result.stamp:
+                result = slot
+        return result  # type: ignore[return-value]
 
     def enqueue(self, frame: RF24NetworkFrame) -> bool:
         """Add a `RF24NetworkFrame` to the queue."""
-        if frame.header.message_type in (MSG_FRAG_FIRST, MSG_FRAG_MORE, MSG_FRAG_LAST):
-            if frame.header.message_type == MSG_FRAG_FIRST:
-                self._frags.unpack(frame.pack())  # make copy not reference
-                return True
+        msg_t = frame.header.message_type
+        if msg_t not in (MSG_FRAG_FIRST, MSG_FRAG_MORE, MSG_FRAG_LAST):
+            return super().enqueue(frame)
+        now = time.monotonic_ns()
+        if msg_t == MSG_FRAG_FIRST:
+            slot = self._claim_slot(frame, now)
+            slot.release()
+            slot.active = True
+            # a streamed message is flagged with a 0 fragment count
+            slot.streaming = not frame.header.reserved and callable(self.ext_data_sink)
+        else:
+            found = self._find_slot(frame)
+            if found is None:
+                # print("dropping fragment due to missing 1st fragment")
+                return False
+            slot = found
+            if now - slot.stamp > self.frag_timeout * 1000000:
+                # print("dropping stale fragmented message")
+                slot.release()
+                return False
             if (
-                self._frags.header.from_node is not None  # if not just initialized
-                and frame.header.to_node == self._frags.header.to_node
-                and frame.header.frame_id == self._frags.header.frame_id
-            ):
-                if (
-                    self._frags.header.reserved - 1 != frame.header.reserved
-                    and frame.header.message_type != MSG_FRAG_LAST
-                ):
-                    # print("dropping non sequential fragment")
-                    return False
-                self._frags.header.unpack(frame.header.pack())
-                self._frags.message += frame.message[:]
-                if frame.header.message_type == MSG_FRAG_LAST:
-                    if frame.header.reserved == NETWORK_EXT_DATA:
-                        # External data needs to be propagated back to update()
-                        frame.header.message_type = NETWORK_EXT_DATA  # by reference
-                    self._frags.header.message_type = frame.header.reserved
-                    return super().enqueue(self._frags)
-                return True
-            # print("dropping fragment due to missing 1st fragment")
+                slot.header.reserved - 1
+            ) & 0xFF != frame.header.reserved and msg_t != MSG_FRAG_LAST:
+                # print("dropping non sequential fragment")
+                return False
+        if slot.streaming:
+            slot.stamp = now
+            slot.header.unpack(frame.header.pack())
+            if msg_t == MSG_FRAG_LAST:
+                slot.release()
+                if frame.header.reserved == NETWORK_EXT_DATA:
+                    frame.header.message_type = NETWORK_EXT_DATA  # by reference
+            self.ext_data_sink(frame)  # type: ignore[misc]
+            return True
+        end = slot.length + len(frame.message)
+        if end > len(slot.buf):
+            # print("dropping fragmented message that exceeds max message length")
+            slot.release()
+            return False
+        slot.buf[slot.length : end] = frame.message
+        slot.length = end
+        slot.stamp = now
+        slot.header.unpack(frame.header.pack())
+        if msg_t == MSG_FRAG_LAST:
+            if frame.header.reserved == NETWORK_EXT_DATA:
+                # External data needs to be propagated back to update()
+                frame.header.message_type = NETWORK_EXT_DATA  # by reference
+            slot.header.message_type = frame.header.reserved
+            result = super().enqueue(
+                RF24NetworkFrame(slot.header, slot.buf[: slot.length])
+            )
+            slot.release()
+            return result
+        return True
+
+
+class DhcpTable:
+    """A table of mesh nodes' ID numbers and their assigned addresses that is indexed
+    both ways. It behaves like a `dict` of ``{node_id: address}``."""
+
+    def __init__(self, table: Optional[Dict[int, int]] = None):
+        self._addrs = array("H", [_UNASSIGNED] * 256)  # indexed by node ID
+        self._ids: Dict[int, int] = {}  # node IDs keyed by address
+        self._used: Dict[int, int] = {}  # bitmask of used child slots per parent
+        self._lease_time = 0
+        self._seen = array("L", [0] * 256)  # when (in seconds) each node was last heard
+        self._expiry: List[Tuple[int, int]] = []  # min-heap of (expiry, node_id)
+        self._queued = bytearray(256)  # flags for node IDs that are in the heap
+        #: A function called with ``(node_id, address)`` when an assignment changes.
+        self.on_change: Optional[Callable[[int, int], Any]] = None
+        if table is not None:
+            self.update(table)
+
+    @property
+    def lease_time(self) -> int:
+        """The number of seconds an address stays assigned without hearing from it.
+        Defaults to 0 (addresses never expire)."""
+        return self._lease_time
+
+    @lease_time.setter
+    def lease_time(self, seconds: int):
+        self._lease_time = max(0, int(seconds))
+        self._expiry = []
+        self._queued = bytearray(256)
+        if self._lease_time:
+            for node_id in self.keys():
+                self._queue_lease(node_id)
+
+    def _now(self) -> int:
+        """the current time (in seconds) used for leases"""
+        return int(time.monotonic())
+
+    def _queue_lease(self, node_id: int):
+        if not self._queued[node_id]:
+            self._queued[node_id] = 1
+            _heap_push(self._expiry, (self._seen[node_id] + self._lease_time, node_id))
+
+    def touch(self, address: int):
+        """Renew the lease of an ``address`` (if it is assigned)."""
+        node_id = self._ids.get(address)
+        if node_id is not None:
+            self._seen[node_id] = self._now()
+
+    def expire(self) -> List[int]:
+        """Release the addresses with expired leases and return them."""
+        released: List[int] = []
+        if not self._lease_time:
+            return released
+        now = self._now()
+        heap = self._expiry
+        while heap and heap[0][0] <= now:
+            node_id = _heap_pop(heap)[1]
+            address = self._addrs[node_id]
+            if address != _UNASSIGNED:
+                due = self._seen[node_id] + self._lease_time
+                if due > now:  # renewed since it was queued
+                    _heap_push(heap, (due, node_id))
+                    continue
+                self.release(address)
+                released.append(address)
+            self._queued[node_id] = 0
+        return released
+
+    def get_address(self, node_id: int) -> int:
+        """Get the address assigned to a ``node_id`` (or -2 if not assigned)."""
+        if not 0 <= node_id <= 255 or self._addrs[node_id] == _UNASSIGNED:
+            return -2
+        return self._addrs[node_id]
+
+    def get_node_id(self, address: int) -> int:
+        """Get the node ID assigned to an ``address`` (or -2 if not assigned)."""
+        return self._ids.get(address, -2)
+
+    def assign(self, node_id: int, address: int):
+        """Assign an ``address`` to a ``node_id`` (taking it from any other node ID)."""
+        if not 0 <= node_id <= 255:
+            raise ValueError("node_id must be in range [0, 255]")
+        if not 0 <= address < _UNASSIGNED:
+            raise ValueError("address must be in range [0, 0xFFFE]")
+        old_id = self._ids.get(address)
+        changed = old_id != node_id
+        if old_id is not None:
+            self._addrs[old_id] = _UNASSIGNED
+            self._mark(address, False)
+        old_addr = self._addrs[node_id]
+        if old_addr != _UNASSIGNED:
+            del self._ids[old_addr]
+            self._mark(old_addr, False)
+        self._addrs[node_id] = address
+        self._ids[address] = node_id
+        self._mark(address, True)
+        self._seen[node_id] = self._now()
+        if self._lease_time:
+            self._queue_lease(node_id)
+        if changed and self.on_change is not None:
+            self.on_change(node_id, address)
+
+    def _mark(self, address: int, used: bool):
+        parent, slot, _ = _split_address(address)
+        mask = self._used.get(parent, 0) & ~(1 << slot) | (used << slot)
+        if mask:
+            self._used[parent] = mask
+        else:
+            self._used.pop(parent, None)
+
+    def allocate(self, node_id: int, parent: int, max_children: int) -> int:
+        """Assign a ``node_id`` the highest free child address of a ``parent`` (or
+        return -1 if all of the ``parent``'s children are assigned)."""
+        _, _, shift = _split_address(parent)
+        if parent:
+            shift += 3
+        if shift > 9:  # children would exceed the 4 levels of a logical address
+            return -1
+        used = self._used.get(parent, 0)
+        own = self.get_address(node_id)
+        if own >= 0:
+            own_parent, own_slot, _ = _split_address(own)
+            if own_parent == parent:
+                used &= ~(1 << own_slot)  # the node can keep its address
+        if parent | (4 << shift) == NETWORK_DEFAULT_ADDR:
+            used |= 1 << 4
+        free = ~used & ((2 << min(max_children, 5)) - 2)
+        if not free:
+            return -1
+        address = parent | (_HIGHEST_BIT[free] << shift)
+        self.assign(node_id, address)
+        return address
+
+    def release(self, address: int) -> bool:
+        """Remove the node ID assigned to an ``address``."""
+        node_id = self._ids.pop(address, None)
+        if node_id is None:
             return False
-        return super().enqueue(frame)
+        self._addrs[node_id] = _UNASSIGNED
+        self._mark(address, False)
+        if self.on_change is not None:
+            self.on_change(node_id, -2)
+        return True
+
+    def __getitem__(self, node_id: int) -> int:
+        address = self.get_address(node_id)
+        if address < 0:
+            raise KeyError(node_id)
+        return address
+
+    def __setitem__(self, node_id: int, address: int):
+        self.assign(node_id, address)
+
+    def __delitem__(self, node_id: int):
+        self.release(self[node_id])
+
+    def __contains__(self, node_id: int) -> bool:
+        return self.get_address(node_id) >= 0
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __iter__(self) -> "Iterator[int]":
+        return iter(self.keys())
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, DhcpTable):
+            other = other.copy()
+        return self.copy() == other
+
+    def __repr__(self) -> str:
+        return "DhcpTable({})".format(self.copy())
+
+    def keys(self) -> List[int]:
+        """A `list` of the assigned node IDs."""
+        return [n_id for n_id in range(256) if self._addrs[n_id] != _UNASSIGNED]
+
+    def values(self) -> List[int]:
+        """A `list` of the assigned addresses (ordered by node ID)."""
+        return [self._addrs[n_id] for n_id in self.keys()]
+
+    def items(self) -> List[Tuple[int, int]]:
+        """A `list` of ``(node_id, address)`` pairs (ordered by node ID)."""
+        return [(n_id, self._addrs[n_id]) for n_id in self.keys()]
+
+    def get(self, node_id: int, default: Optional[int] = None) -> Optional[int]:
+        """Get the address assigned to a ``node_id`` (or ``default``)."""
+        address = self.get_address(node_id)
+        return default if address < 0 else address
+
+    def pop(self, node_id: int, *default: int) -> int:
+        """Remove a ``node_id`` and return its address."""
+        address = self.get_address(node_id)
+        if address < 0:
+            if default:
+                return default[0]
+            raise KeyError(node_id)
+        self.release(address)
+        return address
+
+    def update(self, table: Union[Dict[int, int], "DhcpTable"]):
+        """Assign all ``{node_id: address}`` pairs from another table."""
+        for node_id, address in table.items():
+            self.assign(int(node_id), address)
+
+    def clear(self):
+        """Remove all assignments."""
+        for node_id in self._ids.values():
+            self._addrs[node_id] = _UNASSIGNED
+            if self.on_change is not None:
+                self.on_change(node_id, -2)
+        self._ids = {}
+        self._used = {}
+        self._expiry = []
+        self._queued = bytearray(256)
+
+    def copy(self) -> Dict[int, int]:
+        """Get the assignments as a `dict`."""
+        return dict(self.items())
+
+
+class MappedDhcpTable(DhcpTable):
+    """A `DhcpTable` that is stored in a memory-mapped file (requires the `mmap`
+    module). The file uses the host's native byte order, so it can't be shared
+    between hosts of different endianness."""
+
+    def __init__(self, filename: str):
+        if mmap is None:
+            raise RuntimeError("the mmap module is not available")
+        super().__init__()
+        # the file stays open until close(), so it can't be opened in a with block
+        try:
+            self._file = open(filename, "r+b")  # noqa: SIM115
+        except OSError:
+            self._file = open(filename, "w+b")  # noqa: SIM115
+        try:
+            self._map = self._map_file(filename)
+        except BaseException:
+            self._file.close()
+            raise
+        view = memoryview(self._map)
+        self._addrs = view[8 : 8 + 512].cast("H")  # type: ignore[assignment]
+        self._seen = view[8 + 512 :].cast("I")  # type: ignore[assignment]
+        view.release()
+        for node_id in range(256):
+            address = self._addrs[node_id]
+            if address != _UNASSIGNED:
+                if address in self._ids:  # only keep 1 node ID per address
+                    self._addrs[self._ids[address]] = _UNASSIGNED
+                self._ids[address] = node_id
+                self._mark(address, True)
+
+    def _map_file(self, filename: str) -> "mmap.mmap":
+        """initialize (if new) & validate the open file, then map it"""
+        if not self._file.read(4):  # a new file
+            self._file.write(_MAP_MAGIC + struct.pack("=HH", _MAP_VERSION, 0))
+            self._file.write(self._addrs.tobytes() + bytes(256 * 4))
+            self._file.flush()
+        self._file.seek(0)
+        header = self._file.read(8)
+        if (
+            header[:4] != _MAP_MAGIC
+            or struct.unpack("=H", header[4:6])[0] != _MAP_VERSION
+            or self._file.seek(0, 2) != _MAP_SIZE
+        ):
+            raise ValueError("{} is not a mapped DHCP table".format(filename))
+        return mmap.mmap(self._file.fileno(), _MAP_SIZE)
+
+    def _now(self) -> int:
+        # the seconds since the epoch are meaningful after restarting & to other apps
+        return int(time.time())
+
+    def flush(self):
+        """Write the changes to the file now (instead of when the OS chooses)."""
+        if self._map is not None:
+            self._map.flush()
+
+    def close(self):
+        """Unmap the file. The table keeps its assignments in memory."""
+        if self._map is None:
+            return
+        addrs, seen = (array("H", self._addrs), array("L", self._seen))
+        self._addrs.release()  # type: ignore[attr-defined]
+        self._seen.release()  # type: ignore[attr-defined]
+        self._addrs, self._seen = (addrs, seen)
+        self._map.close()
+        self._map = None
+        self._file.close()
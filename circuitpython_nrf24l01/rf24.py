@@ -44,6 +44,7 @@ _TX_ADDR = const(0x10)  # Address used for TX transmissions
 _RX_PW_P0 = const(0x11)  # RX payload widths; pipes 0-5 = 0x11-0x16
 _DYN_PL = const(0x1C)  # dynamic payloads status for all pipes
 _FEATURE = const(0x1D)  # dynamic TX-payloads, TX-ACK payloads, TX-NO_ACK
+_ACK_QUEUE_SIZE = const(8)  # max pending ACK payloads per pipe for queue_ack()
 
 # various states of a radio's FIFO.
 #: A constant to represent a FIFO state when it is full.
@@ -126,6 +127,11 @@ class RF24:
         self._channel = 76  # 2.476 GHz
         self._addr_len = 5  # 5-byte long addresses
         self._pl_len = [32] * 6  # 32-byte static payloads for all pipes
+        # pending ACK payloads per pipe & (pipe, payload) pairs loaded in the TX FIFO
+        self._ack_queues: Optional[List[List[Union[bytes, bytearray]]]] = None
+        self._acks_loaded: List[Tuple[int, Union[bytes, bytearray]]] = []
+        self._acks_sent: List[Tuple[int, Union[bytes, bytearray]]] = []
+        self._last_ack: Optional[Union[bytes, bytearray]] = None
 
         with self:  # dumps internal attributes to all registers
             self.flush_rx()
@@ -321,6 +327,8 @@ class RF24:
         if not return_size:
             return None
         result = self._reg_read_bytes(0x61, return_size)
+        if self._ack_queues is not None:
+            self._ack_consumed(self._in[0] >> 1 & 7)
         self.clear_status_flags(True, False, False)
         return result
 
@@ -357,6 +365,95 @@ class RF24:
         # self._ce_pin.value = False
         return result  # type: ignore[return-value]
 
+    def send_many(
+        self,
+        pairs: Sequence[Tuple[Union[bytes, bytearray], Union[bytes, bytearray]]],
+        ask_no_ack: bool = False,
+        force_retry: int = 0,
+        send_only: bool = False,
+    ) -> List[Union[bool, bytearray]]:
+        """This blocking function transmits payloads to multiple TX addresses."""
+        self._ce_pin.value = False
+        self.flush_tx()
+        if not send_only:
+            self.flush_rx()
+        self.clear_status_flags()
+        results: List[Union[bool, bytearray]] = [False] * len(pairs)
+        addr_len = self._addr_len
+        current = bytes(self._tx_address[:addr_len])
+        # group payloads by address (current TX address first); sorting is stable,
+        # so payloads for the same address keep their given order
+        order = sorted(
+            range(len(pairs)),
+            key=lambda i: (
+                bytes(pairs[i][0][:addr_len]) != current,
+                bytes(pairs[i][0][:addr_len]),
+            ),
+        )
+        # ACK payloads can only be matched to their payload with 1 payload in flight
+        depth = 1 if not send_only and self._features & 6 == 6 else 2
+        start = 0
+        while start < len(order):
+            address = bytes(pairs[order[start]][0][:addr_len])
+            end = start + 1
+            while end < len(order) and pairs[order[end]][0][:addr_len] == address:
+                end += 1
+            if address != current:
+                self.open_tx_pipe(address)
+                current = address
+            self._send_group(
+                pairs, order[start:end], results, ask_no_ack, force_retry, depth
+            )
+            start = end
+        return results
+
+    def _send_group(
+        self,
+        pairs: Sequence[Tuple[Union[bytes, bytearray], Union[bytes, bytearray]]],
+        indices: List[int],
+        results: List[Union[bool, bytearray]],
+        ask_no_ack: bool,
+        force_retry: int,
+        depth: int,
+    ):
+        loaded: List[int] = []  # indices of payloads in the TX FIFO (oldest first)
+        retries = force_retry
+        pos = 0
+        while pos < len(indices) or loaded:
+            while pos < len(indices) and len(loaded) < depth:
+                self._load_payload(pairs[indices[pos]][1], ask_no_ack)
+                loaded.append(indices[pos])
+                pos += 1
+                self._ce_pin.value = True
+            while not self._in[0] & 0x30:
+                self.update()
+            if self._in[0] & 0x20:
+                self.clear_status_flags(False, True, False)
+                # at least 1 payload was sent, so at most 1 payload remains
+                remaining = not self._reg_read(0x17) & 0x10
+                for _ in range(len(loaded) - remaining):
+                    index = loaded.pop(0)
+                    results[index] = True
+                    if depth == 1 and self._in[0] >> 1 & 7 < 6:
+                        results[index] = self.read()  # type: ignore[assignment]
+                    retries = force_retry
+                if not remaining:  # discard a flag raised after it was cleared
+                    self.clear_status_flags(False, True, False)
+            if self._in[0] & 0x10:
+                self._ce_pin.value = False
+                if retries:
+                    retries -= 1
+                else:  # drop the failed payload and reload the rest
+                    self.flush_tx()
+                    loaded.pop(0)
+                    for index in loaded:
+                        self._load_payload(pairs[index][1], ask_no_ack)
+                    retries = force_retry
+                self.clear_status_flags(False, False, True)
+                if loaded:
+                    self._ce_pin.value = True
+        self._ce_pin.value = False
+
     @property
     def tx_full(self) -> bool:
         """An `bool` to represent if the TX FIFO is full. (read-only)"""
@@ -717,6 +814,66 @@ class RF24:
         self._reg_write_bytes(0xA8 | pipe_number, buf)
         return not bool(self._in[0] & 1)
 
+    def queue_ack(self, buf: Union[bytes, bytearray], pipe_number: int) -> bool:
+        """Queue an ACK payload for a specific data pipe. The TX FIFO is refilled
+        from the queues as payloads are read."""
+        if pipe_number < 0 or pipe_number > 5:
+            raise IndexError("pipe_number must be in range [0, 5]")
+        if not buf or len(buf) > 32:
+            raise ValueError("payload must have a byte length in range [1, 32]")
+        if self._ack_queues is None:
+            self._ack_queues = [[] for _ in range(6)]
+        queue = self._ack_queues[pipe_number]
+        if len(queue) >= _ACK_QUEUE_SIZE:
+            return False
+        queue.append(buf)
+        self._load_acks()
+        return True
+
+    @property
+    def last_ack(self) -> Optional[Union[bytes, bytearray]]:
+        """The queued ACK payload that answered the payload last returned by
+        `read()`. (read-only)"""
+        return self._last_ack
+
+    def _ack_consumed(self, pipe_number: int):
+        # a payload sent with ask_no_ack gets no ACK, so the TX FIFO's level tells
+        # which loaded ACK payloads were sent (instead of counting received payloads)
+        tx_fifo = self.fifo(True)
+        if tx_fifo & 1:  # TX FIFO is empty
+            self._acks_sent += self._acks_loaded
+            self._acks_loaded = []
+        elif not tx_fifo & 2 and len(self._acks_loaded) > 1:
+            # 1 or 2 are left; assume this payload's ACK used 1 (if any)
+            for i, entry in enumerate(self._acks_loaded):
+                if entry[0] == pipe_number:
+                    self._acks_sent.append(self._acks_loaded.pop(i))
+                    break
+        self._last_ack = None
+        for i, (pipe, buf) in enumerate(self._acks_sent):
+            if pipe == pipe_number:
+                self._last_ack = buf
+                del self._acks_sent[i]
+                break
+        self._load_acks()
+
+    def _load_acks(self):
+        assert self._ack_queues is not None
+        pipe = self._acks_loaded[-1][0] if self._acks_loaded else 5
+        idle = 0
+        # fill the TX FIFO taking turns between pipes
+        while len(self._acks_loaded) < 3 and idle < 6:
+            pipe = (pipe + 1) % 6
+            queue = self._ack_queues[pipe]
+            if not queue:
+                idle += 1
+                continue
+            idle = 0
+            self.load_ack(queue[0], pipe)
+            if self._in[0] & 1:  # TX FIFO was already full before loading
+                break
+            self._acks_loaded.append((pipe, queue.pop(0)))
+
     @property
     def allow_ask_no_ack(self) -> bool:
         """Allow or disable ``ask_no_ack`` parameter to `send()` & `write()`."""
@@ -834,6 +991,13 @@ class RF24:
     ) -> bool:
         """This non-blocking and helper function to `send()` can only handle
         one payload at a time."""
+        self.clear_status_flags()
+        self._load_payload(buf, ask_no_ack)
+        if not write_only:
+            self._ce_pin.value = True
+        return not bool(self._in[0] & 1)
+
+    def _load_payload(self, buf: Union[bytes, bytearray], ask_no_ack: bool = False):
         if not self._dyn_pl & 1:
             buf_len = len(buf)
             pl_len = self._pl_len[0]
@@ -843,11 +1007,7 @@ class RF24:
                 buf = buf[:pl_len]
         elif not buf or len(buf) > 32:
             raise ValueError("buffer must have a length in range [1, 32]")
-        self.clear_status_flags()
         self._reg_write_bytes(0xA0 | (bool(ask_no_ack) << 4), buf)
-        if not write_only:
-            self._ce_pin.value = True
-        return not bool(self._in[0] & 1)
 
     def flush_rx(self):
         """Flush all 3 levels of the RX FIFO."""
@@ -856,6 +1016,7 @@ class RF24:
     def flush_tx(self):
         """Flush all 3 levels of the TX FIFO."""
         self._reg_read(0xE1, command=True)
+        self._acks_loaded = []
 
     def fifo(
         self, about_tx: bool = False, check_empty: Optional[bool] = None
@@ -21,6 +21,7 @@
 # THE SOFTWARE.
 """rf24_network module containing the base class RF24Network"""
 
+import os
 import time
 import struct
 
@@ -29,7 +30,7 @@ try:
 except ImportError:
     pass  # some CircuitPython boards don't have the json module
 try:
-    from typing import Union, Dict, Set, Optional, Callable, Any
+    from typing import Union, Dict, List, Optional, Callable, Any, Tuple, Sequence
 except ImportError:
     pass
 import busio  # type:ignore[import]
@@ -44,6 +45,8 @@ from .network.constants import (
     MESH_ADDR_RELEASE,
     MESH_ADDR_LOOKUP,
     MESH_ID_LOOKUP,
+    MESH_ADDR_CHANGE,
+    MESH_BATCH_LOOKUP,
     MESH_LOOKUP_TIMEOUT,
     MESH_WRITE_TIMEOUT,
     MESH_MAX_POLL,
@@ -53,9 +56,44 @@ from .network.constants import (
     TX_MULTICAST,
     MAX_FRAG_SIZE,
 )
-from .network.structs import RF24NetworkHeader, is_address_valid
+from .network.structs import (
+    RF24NetworkHeader,
+    DhcpTable,
+    MappedDhcpTable,
+    is_address_valid,
+)
 from .network.mixins import NetworkMixin, _lvl_2_addr
 
+_RELEASED = 0xFFFF  # the address of a released node ID in a MESH_ADDR_CHANGE record
+_CHANGES_PER_FRAME = 7  # (MAX_FRAG_SIZE - 1 byte sequence number) / 3 bytes per record
+_LOOKUPS_PER_FRAME = 8  # MAX_FRAG_SIZE / 3 bytes per MESH_BATCH_LOOKUP response record
+
+
+_LEASE_SIZE = 6  # address, parent, and master epoch (2 bytes each)
+_JOURNAL_MAGIC = b"DHCJ"  # followed by the journal's version and the dhcp_epoch
+_JOURNAL_VERSION = 1
+_JOURNAL_SLACK = 64  # the number of superseded records allowed before compacting
+
+
+def _get_level(address: int) -> int:
+    """the network level of a logical address"""
+    count = 0
+    while address:
+        address >>= 3
+        count += 1
+    return count
+
+
+def _parent_of(address: int) -> int:
+    """the logical address of a node's parent"""
+    return address & ~(0xFFFF << ((_get_level(address) - 1) * 3))
+
+
+def _journal_record(node_id: int, address: int) -> bytes:
+    """pack a DHCP journal record: node ID, checksum, & address (0xFFFF if released)"""
+    addr = struct.pack("<H", address)
+    return bytes([node_id, ~(node_id + addr[0] + addr[1]) & 0xFF]) + addr
+
 
 class RF24MeshNoMaster(NetworkMixin):
     """A descendant of the same mixin class that `RF24Network` inherits from. This
@@ -73,6 +111,24 @@ class RF24MeshNoMaster(NetworkMixin):
         self._id = min(255, node_id)
         #: This variable can be assigned a function to perform during long operations.
         self.block_less_callback: Optional[Callable[[], Any]] = None
+        #: The maximum number of lookup results cached. Defaults to 16.
+        self.lookup_cache_size: int = 16
+        #: The number of seconds a lookup result is cached. Defaults to 60.
+        self.lookup_cache_ttl: int = 60
+        # least recently used first: {node_id: (address, expiry)}
+        self._lookup_cache: Dict[int, Tuple[int, int]] = {}
+        #: The time (in milliseconds) to wait for responses to `NETWORK_POLL` messages.
+        #: Defaults to 55.
+        self.join_poll_timeout: int = 55
+        #: The time (in milliseconds) to wait for the master node's response to an
+        #: address request. Defaults to 225.
+        self.join_request_timeout: int = 225
+        #: The time spent (in milliseconds) in each step of the last `renew_address()`.
+        self.join_timings: Dict[str, float] = {}
+        self._lease: Optional[bytes] = None
+        # the addresses that the master multicasted in MESH_ADDR_CHANGE messages
+        self._dhcp_replica = DhcpTable()
+        self._replica_seq = -1
         self.ret_sys_msg = True  # force _net_update() to return system message types
         self._begin(0 if not node_id else NETWORK_DEFAULT_ADDR)  # setup radio
 
@@ -86,6 +142,7 @@ class RF24MeshNoMaster(NetworkMixin):
         if self._addr != NETWORK_DEFAULT_ADDR:
             self.release_address()
         self._id = _id & 0xFF
+        self._lease = None
 
     def print_details(self, dump_pipes: bool = False, network_only: bool = False):
         """See RF24.print_details() and Shared Networking API docs"""
@@ -104,9 +161,35 @@ class RF24MeshNoMaster(NetworkMixin):
             self.frame_buf.message = b""
             if self._write(0, TX_NORMAL):
                 super()._begin(NETWORK_DEFAULT_ADDR)
+                self._lease = None
                 return True
         return False
 
+    @property
+    def lease(self) -> Optional[bytes]:
+        """The address, parent, and master node's epoch of the last assigned address
+        (or `None`)."""
+        return self._lease
+
+    @lease.setter
+    def lease(self, lease: Optional[Union[bytes, bytearray]]):
+        if lease is not None:
+            if len(lease) != _LEASE_SIZE:
+                raise ValueError("lease must be {} bytes long".format(_LEASE_SIZE))
+            address, parent = struct.unpack("<HH", lease[:4])
+            if (
+                not address
+                or address == NETWORK_DEFAULT_ADDR
+                or not is_address_valid(address)
+                or parent != _parent_of(address)
+            ):
+                raise ValueError("lease does not contain a valid address")
+            lease = bytes(lease)
+        self._lease = lease
+
+    def _save_lease(self, epoch: int):
+        self._lease = struct.pack("<HHH", self._addr, self._parent, epoch)
+
     def renew_address(self, timeout: Union[float, int] = 7.5):
         """Connect to the mesh network and request a new `node_address`."""
         if self._rf24.available():
@@ -114,15 +197,56 @@ class RF24MeshNoMaster(NetworkMixin):
 
         if self._addr != NETWORK_DEFAULT_ADDR:
             super()._begin(NETWORK_DEFAULT_ADDR)
-        total_requests, request_count = (0, 0)
-        end_timer = timeout + time.monotonic()
-        while not self._request_address(request_count):
-            if time.monotonic() > end_timer:
-                return None
-            time.sleep((25 + ((total_requests + 1) * (request_count + 1)) * 2) / 1000)
-            request_count = (request_count + 1) % 4
-            total_requests = (total_requests + 1) % 10
-        return self._addr
+        start = time.monotonic_ns()
+        self.join_timings = {
+            "poll": 0,
+            "request": 0,
+            "verify": 0,
+            "total": 0,
+            "attempts": 0,
+        }
+        if self._lease is not None:
+            if self._fast_rejoin(self._lease):
+                self._join_timing("total", start)
+                return self._addr
+            super()._begin(NETWORK_DEFAULT_ADDR)
+        end_timer = timeout * 1000000000 + start
+        result = None
+        while True:
+            self.join_timings["attempts"] += 1
+            if self._request_address():
+                result = self._addr
+                break
+            if time.monotonic_ns() > end_timer:
+                break
+            time.sleep(min(self.join_timings["attempts"], 5) / 100)
+        self._join_timing("total", start)
+        return result
+
+    def _fast_rejoin(self, lease: bytes) -> bool:
+        """Reuse the address of a `lease` if the master node confirms it"""
+        start = time.monotonic_ns()
+        address, _, epoch = struct.unpack("<HHH", lease)
+        super()._begin(address)
+        confirmed = self._lookup_2_master(self._id, MESH_ADDR_LOOKUP) == address
+        if confirmed:
+            if len(self.frame_buf.message) >= 4:
+                master_epoch = struct.unpack("<H", self.frame_buf.message[2:4])[0]
+                if master_epoch != epoch:
+                    # the master node restarted; other nodes may have new addresses
+                    self.clear_lookup_cache()
+                    epoch = master_epoch
+            self._save_lease(epoch)
+        self._join_timing("verify", start)
+        return confirmed
+
+    def _join_timing(self, step: str, since: int) -> int:
+        """Add the time since ``since`` to a step in `join_timings`"""
+        now = time.monotonic_ns()
+        self.join_timings[step] = (
+            self.join_timings.get(step, 0) + (now - since) / 1000000
+        )
+        return now
 
     def lookup_address(self, node_id: Optional[int] = None) -> int:
         """Convert a node's unique ID number into its corresponding
@@ -131,7 +255,7 @@ class RF24MeshNoMaster(NetworkMixin):
             return 0
         if self._addr == NETWORK_DEFAULT_ADDR:
             return -2
-        return self._lookup_2_master(node_id, MESH_ADDR_LOOKUP)
+        return self._lookup(node_id, MESH_ADDR_LOOKUP)
 
     def lookup_node_id(self, address: Optional[int] = None) -> int:
         """Convert a node's :ref:`Logical Address <Logical Address>` into its
@@ -140,7 +264,86 @@ class RF24MeshNoMaster(NetworkMixin):
             return self._id if address is None else 0
         if self._addr == NETWORK_DEFAULT_ADDR:
             return -2
-        return self._lookup_2_master(address, MESH_ID_LOOKUP)
+        return self._lookup(address, MESH_ID_LOOKUP)
+
+    def lookup_addresses(self, node_ids: Sequence[int]) -> Dict[int, int]:
+        """Convert several nodes' unique ID numbers into their corresponding
+        :ref:`Logical Addresses <Logical Address>` with 1 request to the master node."""
+        results: Dict[int, int] = {}
+        missing = bytearray()
+        for node_id in node_ids:
+            if node_id in results:
+                continue
+            if not node_id:
+                results[node_id] = 0
+            elif self._addr == NETWORK_DEFAULT_ADDR:
+                results[node_id] = -2
+            else:
+                results[node_id] = self._lookup_local(node_id, MESH_ADDR_LOOKUP)
+                if results[node_id] < 0:
+                    missing.append(node_id)
+        if missing:
+            for node_id, address in self._batch_lookup_2_master(missing).items():
+                results[node_id] = address
+                if address >= 0:
+                    self._cache_lookup(node_id, address)
+        return results
+
+    def clear_lookup_cache(self, node_id: Optional[int] = None):
+        """Forget the cached lookup result of a ``node_id`` (or all results)."""
+        if node_id is None:
+            self._lookup_cache = {}
+            self._dhcp_replica.clear()
+        else:
+            self._lookup_cache.pop(node_id, None)
+            self._dhcp_replica.release(self._dhcp_replica.get_address(node_id))
+
+    def _cache_lookup(self, node_id: int, address: int):
+        """Remember a lookup result (evicting the least recently used)."""
+        if self.lookup_cache_size <= 0:
+            return
+        self._lookup_cache.pop(node_id, None)
+        for n_id, entry in list(self._lookup_cache.items()):
+            if entry[0] == address:  # the address moved to a different node ID
+                del self._lookup_cache[n_id]
+        while len(self._lookup_cache) >= self.lookup_cache_size:
+            del self._lookup_cache[next(iter(self._lookup_cache))]
+        expiry = time.monotonic_ns() + self.lookup_cache_ttl * 1000000000
+        self._lookup_cache[node_id] = (address, expiry)
+
+    def _lookup_local(self, number: int, lookup_type: int) -> int:
+        """Lookup from the replica or the cache; returns -1 if not found"""
+        if lookup_type == MESH_ID_LOOKUP:
+            result = self._dhcp_replica.get_node_id(number)
+        else:
+            result = self._dhcp_replica.get_address(number)
+        if result >= 0:
+            return result
+        now = time.monotonic_ns()
+        for n_id, (addr, expiry) in self._lookup_cache.items():
+            key, result = (n_id, addr)
+            if lookup_type == MESH_ID_LOOKUP:
+                key, result = (addr, n_id)
+            if key == number:
+                del self._lookup_cache[n_id]
+                if expiry > now:
+                    self._lookup_cache[n_id] = (addr, expiry)  # most recently used
+                    return result
+                break
+        return -1
+
+    def _lookup(self, number: int, lookup_type: int) -> int:
+        """Lookup from the replica, the cache, or else from the master node"""
+        result = self._lookup_local(number, lookup_type)
+        if result >= 0:
+            return result
+        result = self._lookup_2_master(number, lookup_type)
+        if result >= 0:
+            if lookup_type == MESH_ID_LOOKUP:
+                self._cache_lookup(result, number)
+            else:
+                self._cache_lookup(number, result)
+        return result
 
     def _lookup_2_master(self, number: int, lookup_type: int) -> int:
         """Returns False if timed out, otherwise lookup result"""
@@ -160,9 +363,64 @@ class RF24MeshNoMaster(NetworkMixin):
             if time.monotonic_ns() > timeout:
                 return -1
         if lookup_type == MESH_ADDR_LOOKUP:
-            return struct.unpack("<H", self.frame_buf.message[:2])[0]
+            return struct.unpack("<h", self.frame_buf.message[:2])[0]
         return self.frame_buf.message[0]
 
+    def _batch_lookup_2_master(self, node_ids: bytearray) -> Dict[int, int]:
+        """Returns the addresses of node_ids (-1 for those not answered)"""
+        results = dict.fromkeys(node_ids, -1)
+        pending = 0
+        # send all requests before waiting, so the answers take 1 round-trip
+        for i in range(0, len(node_ids), MAX_FRAG_SIZE):
+            self.frame_buf.header = RF24NetworkHeader(0, MESH_BATCH_LOOKUP)
+            self.frame_buf.header.from_node = self._addr
+            self.frame_buf.message = bytes(node_ids[i : i + MAX_FRAG_SIZE])
+            if self._write(0, TX_NORMAL):
+                pending += len(self.frame_buf.message)
+        timeout = MESH_LOOKUP_TIMEOUT * 1000000 + time.monotonic_ns()
+        while pending and time.monotonic_ns() <= timeout:
+            if self._net_update() == MESH_BATCH_LOOKUP:
+                message = self.frame_buf.message
+                for i in range(0, len(message) - 2, 3):
+                    node_id, address = struct.unpack("<BH", message[i : i + 3])
+                    if results.get(node_id) == -1:
+                        results[node_id] = -2 if address == _RELEASED else address
+                        pending -= 1
+            if callable(self.block_less_callback):
+                self.block_less_callback()
+        return results
+
+    def _handle_frame_for_other_node(self, msg_t: int) -> Tuple[bool, int]:
+        if (
+            msg_t == MESH_ADDR_CHANGE
+            and self.frame_buf.header.to_node == NETWORK_MULTICAST_ADDR
+        ):
+            if self.allow_multicast and not self._is_multicast_duplicate():
+                if self._addr not in (0, NETWORK_DEFAULT_ADDR):
+                    self._apply_dhcp_changes(self.frame_buf.message)
+                if self.multicast_relay:
+                    self._relay_multicast()
+            return (True, msg_t)
+        return super()._handle_frame_for_other_node(msg_t)
+
+    def _apply_dhcp_changes(self, message: Union[bytes, bytearray]):
+        """Update the replica with a MESH_ADDR_CHANGE message from the master node"""
+        if not message or (len(message) - 1) % 3:
+            return  # malformed (a sequence number & 3 bytes per change)
+        seq = message[0]
+        if seq == self._replica_seq:
+            return  # already applied
+        if self._replica_seq >= 0 and seq != (self._replica_seq + 1) & 0xFF:
+            self._dhcp_replica.clear()  # missed some changes
+        self._replica_seq = seq
+        for i in range(1, len(message), 3):
+            node_id, address = struct.unpack("<BH", message[i : i + 3])
+            self._lookup_cache.pop(node_id, None)
+            if address == _RELEASED:
+                self._dhcp_replica.release(self._dhcp_replica.get_address(node_id))
+            elif self._is_address_valid(address):
+                self._dhcp_replica.assign(node_id, address)
+
     def check_connection(self, attempts: int = 3, ping_master: bool = False) -> bool:
         """Check for network connectivity (not for use on master node)."""
         if not self._id:
@@ -171,7 +429,8 @@ class RF24MeshNoMaster(NetworkMixin):
             return False
         for _ in range(attempts):
             if ping_master:
-                result = self.lookup_address(self._id)
+                # ask the master node itself; cached results don't prove connectivity
+                result = self._lookup_2_master(self._id, MESH_ADDR_LOOKUP)
                 if result == -2:
                     return False
                 if result == self._addr:
@@ -180,28 +439,23 @@ class RF24MeshNoMaster(NetworkMixin):
                 return True
         return False
 
-    def update(self) -> int:
+    def update(
+        self, max_frames: Optional[int] = None, max_time_us: Optional[int] = None
+    ) -> int:
         """Checks for incoming network data and returns last message type (if any)"""
-        msg_t = self._net_update()
+        msg_t = self._net_update(max_frames, max_time_us)
         if self._addr == NETWORK_DEFAULT_ADDR:
             return msg_t
         return msg_t
 
-    def _request_address(self, level: int) -> bool:
+    def _request_address(self) -> bool:
         """Get a new address assigned from the master node"""
-        contacts = self._make_contact(level)
-        # print("Got", len(contacts), "responses on level",level)
-        if not contacts:
-            return False
-
-        def _get_level(address: int) -> int:
-            count = 0
-            while address:
-                address >>= 3
-                count += 1
-            return count
-
-        new_addr = None
+        start = time.monotonic_ns()
+        contacts = self._make_contact(range(4))
+        start = self._join_timing("poll", start)
+        # print("Got", len(contacts), "responses")
+        requested: List[int] = []
+        new_addr, epoch = (None, 0)
         for contact in contacts:
             # print("Requesting address from", oct(contact))
             self.frame_buf.header.to_node = contact
@@ -210,46 +464,72 @@ class RF24MeshNoMaster(NetworkMixin):
             self.frame_buf.header.reserved = self._id
             self.frame_buf.message = b""
             self._write(contact, TX_PHYSICAL)  # do a no auto-ack write
-            timeout = 225000000 + time.monotonic_ns()
+            requested.append(contact)
+            timeout = self.join_request_timeout * 1000000 + time.monotonic_ns()
             while time.monotonic_ns() < timeout:  # wait for network ack
                 if (
                     self._net_update() == MESH_ADDR_RESPONSE
                     and self.frame_buf.header.reserved == self.node_id
                 ):
                     new_addr = struct.unpack("<H", self.frame_buf.message[:2])[0]
-                    test_addr = new_addr & ~(0xFFFF << (_get_level(contact) * 3))
-                    if test_addr != contact:
+                    if new_addr == NETWORK_DEFAULT_ADDR:
+                        new_addr = None  # a contact has no free child addresses
+                        # the response keeps the request's from_node (which is
+                        # NETWORK_DEFAULT_ADDR if the contact is the master node)
+                        if self.frame_buf.header.from_node == (
+                            contact or NETWORK_DEFAULT_ADDR
+                        ):
+                            break
+                        continue  # ignore a previous contact's late response
+                    # a late response to a previous contact's request is also valid
+                    if _parent_of(new_addr) not in requested:
                         new_addr = None
-                    else:
-                        break
+                    elif len(self.frame_buf.message) >= 4:
+                        epoch = struct.unpack("<H", self.frame_buf.message[2:4])[0]
+                    break
             if callable(self.block_less_callback):
                 self.block_less_callback()
             if new_addr is None:
                 continue
+            start = self._join_timing("request", start)
             super()._begin(new_addr)
             # print("new address assigned:", oct(new_addr))
             # do a double check as a manual retry in lack of using auto-ack
-            if self.lookup_node_id(self._addr) != self._id:
-                if self.lookup_node_id(self._addr) != self._id:
+            if self._lookup_2_master(self._addr, MESH_ID_LOOKUP) != self._id:
+                if self._lookup_2_master(self._addr, MESH_ID_LOOKUP) != self._id:
                     super()._begin(NETWORK_DEFAULT_ADDR)
+                    start = self._join_timing("verify", start)
                     continue
+            self._join_timing("verify", start)
+            self._save_lease(epoch)
             return True
+        self._join_timing("request", start)
         return False
 
-    def _make_contact(self, lvl: int) -> Set[int]:
-        """Make a set of connections after multicasting a `NETWORK_POLL` message."""
-        responders: Set[int] = set()
+    def _make_contact(self, levels: Sequence[int]) -> List[int]:
+        """Multicast a `NETWORK_POLL` message to several network levels at once and
+        return the responders ranked from best to worst."""
+        responders: Dict[int, Tuple[bool, int, int]] = {}
         self.frame_buf.header.to_node = NETWORK_MULTICAST_ADDR
         self.frame_buf.header.from_node = NETWORK_DEFAULT_ADDR
         self.frame_buf.header.message_type = NETWORK_POLL
         self.frame_buf.message = b""
-        # self.multicast() does some extra logic to protect from user misuse.
-        self._write(_lvl_2_addr(lvl), TX_MULTICAST)
-        timeout = 55000000 + time.monotonic_ns()
+        for lvl in levels:
+            # self.multicast() does some extra logic to protect from user misuse.
+            self._write(_lvl_2_addr(lvl), TX_MULTICAST)
+            self.frame_buf.header.message_type = NETWORK_POLL
+        timeout = self.join_poll_timeout * 1000000 + time.monotonic_ns()
         while time.monotonic_ns() < timeout and len(responders) < MESH_MAX_POLL:
             if self._net_update() == NETWORK_POLL:
-                responders.add(self.frame_buf.header.from_node)
-        return responders
+                responder = self.frame_buf.header.from_node
+                if responder not in responders:
+                    # prefer a strong signal, then a short route to the master node
+                    strong = self._rf24.rpd
+                    rank = (not strong, _get_level(responder), len(responders))
+                    responders[responder] = rank
+                    if not responder and strong:
+                        break  # the master node is the best possible contact
+        return sorted(responders, key=lambda responder: responders[responder])
 
     @property
     def allow_children(self) -> bool:
@@ -280,7 +560,10 @@ class RF24MeshNoMaster(NetworkMixin):
                 if to_node_addr < 0:
                     time.sleep(retry_delay / 1000)
                     retry_delay += 10
-            to_node = to_node_addr
+            if not self.write(to_node_addr, message_type, message):
+                self.clear_lookup_cache(to_node)  # the node may have a new address
+                return False
+            return True
         if to_node == self._id:
             to_node = self._addr
         return self.write(to_node, message_type, message)
@@ -318,8 +601,49 @@ class RF24Mesh(RF24MeshNoMaster):
     ):
         super().__init__(spi, csn_pin, ce_pin, node_id, spi_frequency)
         self._do_dhcp = False
-        #: A `dict` that enables master nodes to act as a DNS.
-        self.dhcp_dict: Dict[int, int] = {}
+        #: Enable this attribute to multicast changes of the `dhcp_dict` (master node
+        #: only). Defaults to `False`.
+        self.dhcp_multicast: bool = False
+        self._dhcp_changes: Dict[int, int] = {}
+        #: A number that identifies the master node's `dhcp_dict` (random by default).
+        self.dhcp_epoch: int = struct.unpack("<H", os.urandom(2))[0]
+        self._dhcp_seq = 0
+        self._dhcp_table = DhcpTable()
+        self._dhcp_table.on_change = self._note_dhcp_change
+        self._journal: Optional[Any] = None  # the DHCP journal opened for appending
+        self._journal_name = ""
+        self._journal_records = 0
+
+    @property
+    def dhcp_dict(self) -> DhcpTable:
+        """A `DhcpTable` (which behaves like a `dict`) that enables master nodes to act
+        as a DNS."""
+        return self._dhcp_table
+
+    @dhcp_dict.setter
+    def dhcp_dict(self, table: Union[Dict[int, int], DhcpTable]):
+        self._dhcp_table.clear()
+        self._dhcp_table.update(table)
+
+    @property
+    def lease_time(self) -> int:
+        """The number of seconds an assigned address is kept without hearing from the
+        node using it (master node only)."""
+        return self._dhcp_table.lease_time
+
+    @lease_time.setter
+    def lease_time(self, seconds: int):
+        self._dhcp_table.lease_time = seconds
+
+    def _handle_frame_for_this_node(self, msg_t: int) -> Tuple[bool, int]:
+        if self._dhcp_table.lease_time:
+            self._dhcp_table.touch(self.frame_buf.header.from_node)
+        return super()._handle_frame_for_this_node(msg_t)
+
+    def _handle_frame_for_other_node(self, msg_t: int) -> Tuple[bool, int]:
+        if self._dhcp_table.lease_time:
+            self._dhcp_table.touch(self.frame_buf.header.from_node)
+        return super()._handle_frame_for_other_node(msg_t)
 
     def renew_address(self, timeout: Union[float, int] = 7.5):
         if not self._id:
@@ -331,9 +655,11 @@ class RF24Mesh(RF24MeshNoMaster):
             return True
         return super().check_connection(attempts, ping_master)
 
-    def update(self) -> int:
+    def update(
+        self, max_frames: Optional[int] = None, max_time_us: Optional[int] = None
+    ) -> int:
         """Checks for incoming network data and returns last message type (if any)"""
-        msg_t = super().update()
+        msg_t = super().update(max_frames, max_time_us)
         if msg_t == MESH_ADDR_REQUEST and self.frame_buf.header.reserved:
             self._do_dhcp = True
         if not self.lookup_node_id():  # if this is the master node
@@ -343,71 +669,100 @@ class RF24Mesh(RF24MeshNoMaster):
                 ret_val = 0  # will be -2 for requesting un-assigned nodes
                 if msg_t == MESH_ADDR_LOOKUP:
                     ret_val = self.lookup_address(self.frame_buf.message[0])
-                    self.frame_buf.message = struct.pack("<H", ret_val)
+                    self.frame_buf.message = struct.pack(
+                        "<hH", ret_val, self.dhcp_epoch & 0xFFFF
+                    )
                 else:
                     ret_val = self.lookup_node_id(
                         struct.unpack("<H", self.frame_buf.message[:2])[0]
                     )
                     self.frame_buf.message = bytes([ret_val])
                 self._write(self.frame_buf.header.to_node, TX_NORMAL)
+            elif msg_t == MESH_BATCH_LOOKUP:
+                self._answer_batch_lookup()
             elif msg_t == MESH_ADDR_RELEASE:
                 self.release_address(self.frame_buf.header.from_node)
             self._dhcp()
+            self._dhcp_table.expire()
+            if self._dhcp_changes:
+                self._push_dhcp_changes()
         return msg_t
 
+    def _answer_batch_lookup(self):
+        """Respond to a MESH_BATCH_LOOKUP request (master node only)."""
+        to_node = self.frame_buf.header.from_node
+        node_ids = bytes(self.frame_buf.message)
+        for i in range(0, len(node_ids), _LOOKUPS_PER_FRAME):
+            message = bytearray()
+            for node_id in node_ids[i : i + _LOOKUPS_PER_FRAME]:
+                address = self.lookup_address(node_id)
+                message += struct.pack(
+                    "<BH", node_id, address if address >= 0 else _RELEASED
+                )
+            self.frame_buf.header = RF24NetworkHeader(to_node, MESH_BATCH_LOOKUP)
+            self.frame_buf.header.from_node = self._addr
+            self.frame_buf.message = message
+            self._write(to_node, TX_NORMAL)
+
+    def _note_dhcp_change(self, node_id: int, address: int):
+        """Remember a change of the `dhcp_dict` to multicast during `update()` and
+        record it in the DHCP journal."""
+        if address < 0:
+            address = _RELEASED
+        if self.dhcp_multicast:
+            # move it to the end, so the latest changes are applied last
+            self._dhcp_changes.pop(node_id, None)
+            self._dhcp_changes[node_id] = address
+        if self._journal is not None:
+            self._journal.write(_journal_record(node_id, address))
+            self._journal.flush()
+            self._journal_records += 1
+            if self._journal_records > len(self._dhcp_table) * 2 + _JOURNAL_SLACK:
+                self._compact_dhcp_journal()
+
+    def _push_dhcp_changes(self):
+        """Multicast the pending changes of the `dhcp_dict` (master node only)."""
+        changes = list(self._dhcp_changes.items())
+        self._dhcp_changes = {}
+        for i in range(0, len(changes), _CHANGES_PER_FRAME):
+            message = bytearray([self._dhcp_seq])
+            for node_id, address in changes[i : i + _CHANGES_PER_FRAME]:
+                message += struct.pack("<BH", node_id, address)
+            self._dhcp_seq = (self._dhcp_seq + 1) & 0xFF
+            self.multicast(message, MESH_ADDR_CHANGE, 1)
+
     def _dhcp(self):
         """Updates `_dhcp_dict` of assigned addresses (master node only)."""
         if self._do_dhcp:
             self._do_dhcp = False
         else:
             return
-        new_addr, via_node, shift_val = (0, 0, 0)
-        if self.frame_buf.header.from_node != NETWORK_DEFAULT_ADDR:
-            via_node = self.frame_buf.header.from_node
-            temp = via_node
-            while temp:
-                temp >>= 3
-                shift_val += 3
-        extra_child = self.frame_buf.header.from_node == NETWORK_DEFAULT_ADDR
-
-        for i in range(MESH_MAX_CHILDREN + extra_child, 0, -1):
-            found_addr, new_addr = (False, via_node | (i << shift_val))
-            if new_addr == NETWORK_DEFAULT_ADDR:
-                continue
-            for n_id, addr in self.dhcp_dict.items():
-                # print(i, "(in _addr_dict) ID:", n_id, "ADDR:", oct(addr))
-                if addr == new_addr and n_id != self.frame_buf.header.reserved:
-                    found_addr = True
-                    break
-            if not found_addr:
-                self.set_address(self.frame_buf.header.reserved, new_addr)
-
-                self.frame_buf.header.message_type = MESH_ADDR_RESPONSE
-                self.frame_buf.header.to_node = self.frame_buf.header.from_node
-                self.frame_buf.message = struct.pack("<H", new_addr)
-                if self.frame_buf.header.from_node != NETWORK_DEFAULT_ADDR:
-                    if not self._write(self.frame_buf.header.to_node, TX_NORMAL):
-                        self._write(self.frame_buf.header.to_node, TX_NORMAL)
-                else:
-                    self._write(self.frame_buf.header.to_node, TX_PHYSICAL)
-                break
-            # print("address", new_addr, "not allocated.")
+        via_node = self.frame_buf.header.from_node
+        extra_child = via_node == NETWORK_DEFAULT_ADDR
+        new_addr = self._dhcp_table.allocate(
+            self.frame_buf.header.reserved,
+            0 if extra_child else via_node,
+            MESH_MAX_CHILDREN + extra_child,
+        )
+        if new_addr < 0:
+            # all children of via_node are assigned; tell the requesting node to
+            # move on to its next contact instead of waiting for a response
+            new_addr = NETWORK_DEFAULT_ADDR
+        self.frame_buf.header.message_type = MESH_ADDR_RESPONSE
+        self.frame_buf.header.to_node = via_node
+        self.frame_buf.message = struct.pack("<HH", new_addr, self.dhcp_epoch & 0xFFFF)
+        if not extra_child:
+            if not self._write(via_node, TX_NORMAL):
+                self._write(via_node, TX_NORMAL)
+        else:
+            self._write(via_node, TX_PHYSICAL)
 
     def set_address(
         self, node_id: int, node_address: int, search_by_address: bool = False
     ):
         """Set/change a `node_id` and `node_address` pair in the `dhcp_dict`."""
-        for n_id, addr in self.dhcp_dict.items():
-            if not search_by_address:
-                if n_id == node_id:
-                    self.dhcp_dict[n_id] = node_address
-                    return
-            else:
-                if addr == node_address:
-                    del self.dhcp_dict[n_id]
-                    self.dhcp_dict[node_id] = node_address
-                    return
-        self.dhcp_dict[node_id] = node_address
+        # the table keeps each address assigned to only 1 node ID either way
+        self._dhcp_table.assign(node_id, node_address)
 
     def save_dhcp(self, filename: str = "dhcplist.json", as_bin: bool = False):
         """Save the `dhcp_dict` to a JSON file (meant for master nodes only)."""
@@ -416,7 +771,7 @@ class RF24Mesh(RF24MeshNoMaster):
             # running CircuitPython firmware (not RPi) have read-only file system.
             if json is not None and not as_bin:
                 json_file.write(
-                    json.dumps(self.dhcp_dict, indent=2).encode(encoding="utf-8")
+                    json.dumps(self.dhcp_dict.copy(), indent=2).encode(encoding="utf-8")
                 )
             elif as_bin:
                 for _id, _addr in self.dhcp_dict.items():
@@ -440,6 +795,83 @@ class RF24Mesh(RF24MeshNoMaster):
                         struct.unpack("<H", buffer[index + 2 : index + 4])[0],
                     )
 
+    def map_dhcp(self, filename: str = "dhcp.map"):
+        """Keep the `dhcp_dict` in a memory-mapped file (meant for master nodes on
+        Linux only)."""
+        table = MappedDhcpTable(filename)
+        table.update(self._dhcp_table)  # keep the addresses that are already assigned
+        if isinstance(self._dhcp_table, MappedDhcpTable):
+            self._dhcp_table.close()
+        table.lease_time = self._dhcp_table.lease_time
+        table.on_change = self._note_dhcp_change
+        self._dhcp_table = table
+        if self._journal is not None:
+            self._compact_dhcp_journal()  # record the file's assignments too
+
+    def open_dhcp_journal(self, filename: str = "dhcp.journal"):
+        """Restore the `dhcp_dict` from a journal file and record every change to it
+        (meant for master nodes only)."""
+        self.close_dhcp_journal()
+        self._journal_name = filename
+        buffer = b""
+        for name in (filename, filename + ".tmp"):  # the latter if compacting failed
+            try:
+                with open(name, "rb") as journal:
+                    buffer = journal.read()
+                break
+            except OSError:
+                pass
+        if buffer and (
+            buffer[:4] != _JOURNAL_MAGIC
+            or len(buffer) < 8
+            or struct.unpack("<H", buffer[4:6])[0] != _JOURNAL_VERSION
+        ):
+            raise ValueError(
+                "{} is not a version {} DHCP journal".format(filename, _JOURNAL_VERSION)
+            )
+        if buffer:
+            self.dhcp_epoch = struct.unpack("<H", buffer[6:8])[0]
+            for offset in range(8, len(buffer) - 3, 4):
+                node_id, address = (buffer[offset], buffer[offset + 2 : offset + 4])
+                if buffer[offset : offset + 4] != _journal_record(
+                    node_id, struct.unpack("<H", address)[0]
+                ):
+                    break  # the rest of the journal was not completely written
+                if address == b"\xff\xff":
+                    self._dhcp_table.release(self._dhcp_table.get_address(node_id))
+                else:
+                    self._dhcp_table.assign(node_id, struct.unpack("<H", address)[0])
+        self._compact_dhcp_journal()
+
+    def close_dhcp_journal(self):
+        """Stop recording changes of the `dhcp_dict` to the journal file."""
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def _compact_dhcp_journal(self):
+        """Replace the journal with a snapshot of the `dhcp_dict`"""
+        self.close_dhcp_journal()
+        temp_name = self._journal_name + ".tmp"
+        with open(temp_name, "wb") as journal:
+            journal.write(
+                _JOURNAL_MAGIC
+                + struct.pack("<HH", _JOURNAL_VERSION, self.dhcp_epoch & 0xFFFF)
+            )
+            for node_id, address in self._dhcp_table.items():
+                journal.write(_journal_record(node_id, address))
+            journal.flush()
+            if hasattr(os, "fsync"):
+                os.fsync(journal.fileno())
+        try:
+            os.rename(temp_name, self._journal_name)
+        except OSError:  # some file systems can't replace an existing file
+            os.remove(self._journal_name)
+            os.rename(temp_name, self._journal_name)
+        # the journal stays open until close_dhcp_journal()
+        self._journal = open(self._journal_name, "ab")  # noqa: SIM115
+        self._journal_records = len(self._dhcp_table)
+
     def print_details(self, dump_pipes: bool = False, network_only: bool = False):
         """See RF24.print_details() and Shared Networking API docs"""
         super().print_details(False, network_only)
@@ -460,11 +892,7 @@ class RF24Mesh(RF24MeshNoMaster):
         """
         if not address:
             return super().release_address()
-        for id, addr in self.dhcp_dict.items():
-            if addr == address:
-                del self.dhcp_dict[id]
-                return True
-        return False
+        return self._dhcp_table.release(address)
 
     def lookup_address(self, node_id: Optional[int] = None) -> int:
         """Convert a node's unique ID number into its corresponding
@@ -475,7 +903,7 @@ class RF24Mesh(RF24MeshNoMaster):
             return -2
         if not self._id:
             return self._get_address(node_id, MESH_ADDR_LOOKUP)
-        return self._lookup_2_master(node_id, MESH_ADDR_LOOKUP)
+        return self._lookup(node_id, MESH_ADDR_LOOKUP)
 
     def lookup_node_id(self, address: Optional[int] = None) -> int:
         """Convert a node's :ref:`Logical Address <Logical Address>` into its
@@ -486,13 +914,15 @@ class RF24Mesh(RF24MeshNoMaster):
             return -2
         if not self._addr:
             return self._get_address(address, MESH_ID_LOOKUP)
-        return self._lookup_2_master(address, MESH_ID_LOOKUP)
+        return self._lookup(address, MESH_ID_LOOKUP)
+
+    def lookup_addresses(self, node_ids: Sequence[int]) -> Dict[int, int]:
+        if not self._id:
+            return {node_id: self.lookup_address(node_id) for node_id in node_ids}
+        return super().lookup_addresses(node_ids)
 
     def _get_address(self, number: int, lookup_type: int) -> int:
         """Helper for get_address() and lookup_node_id()"""
-        for n_id, addr in self.dhcp_dict.items():
-            if lookup_type == MESH_ID_LOOKUP and addr == number:
-                return n_id
-            if lookup_type == MESH_ADDR_LOOKUP and n_id == number:
-                return addr
-        return -2
+        if lookup_type == MESH_ID_LOOKUP:
+            return self._dhcp_table.get_node_id(number)
+        return self._dhcp_table.get_address(number)
@@ -21,13 +21,16 @@
 # THE SOFTWARE.
 """rf24_network module containing the base class RF24Network"""
 
+import time
+import struct
+
 try:
-    from typing import Union
+    from typing import Union, Any, Optional, Callable, Dict, List
 except ImportError:
     pass
 import busio  # type:ignore[import]
 from digitalio import DigitalInOut  # type:ignore[import]
-from .network.mixins import NetworkMixin
+from .network.mixins import NetworkMixin, _TX_PRIORITIES
 from .network.structs import RF24NetworkHeader, RF24NetworkFrame, is_address_valid
 from .network.constants import (
     NETWORK_MULTICAST_ADDR,
@@ -37,8 +40,16 @@ from .network.constants import (
     TX_LOGICAL,
     TX_MULTICAST,
     MAX_FRAG_SIZE,
+    NETWORK_EXT_DATA,
+    NETWORK_BULK_DATA,
+    NETWORK_BULK_ACK,
+    NETWORK_COALESCED,
+    MAX_USR_DEF_MSG_TYPE,
 )
 
+_BULK_CHUNK = MAX_FRAG_SIZE - 4  # bytes of data per frame sent with send_bulk()
+_BULK_MAX_WINDOW = 32  # limited by the bitmap's size in a NETWORK_BULK_ACK message
+
 
 class RF24NetworkRoutingOnly(NetworkMixin):
     """A minimal Networking implementation for nodes that are meant for strictly
@@ -63,43 +74,302 @@ class RF24NetworkRoutingOnly(NetworkMixin):
             return
         self._begin(val)
 
-    def update(self) -> int:
+    def update(
+        self, max_frames: Optional[int] = None, max_time_us: Optional[int] = None
+    ) -> int:
         """This function is used to keep the network layer current."""
-        return self._net_update()
+        return self._net_update(max_frames, max_time_us)
 
 
 class RF24Network(RF24NetworkRoutingOnly):
     """The object used to instantiate the nRF24L01 as a network node."""
 
-    def send(self, header: RF24NetworkHeader, message: Union[bytes, bytearray]) -> bool:
-        """Deliver a message according to the header information."""
-        return self.write(RF24NetworkFrame(header, message))
+    def __init__(
+        self,
+        spi: busio.SPI,
+        csn_pin: DigitalInOut,
+        ce_pin: DigitalInOut,
+        node_address: int,
+        spi_frequency=10000000,
+    ):
+        super().__init__(spi, csn_pin, ce_pin, node_address, spi_frequency)
+        #: The number of frames `send_bulk()` transmits before waiting for an ACK.
+        self.bulk_window: int = 4
+        self._bulk_id = 0
+        #: The time (in milliseconds) that small messages wait to be combined (0 = off).
+        self.coalesce_timeout: int = 0
+        #: The number of combined frames (of held messages) that failed to transmit.
+        self.coalesce_failures: int = 0
+        # messages to combine per destination: {to_node: [messages, deadline, frame_id]}
+        self._coalesced: Dict[int, List[Any]] = {}
+
+    def update(
+        self, max_frames: Optional[int] = None, max_time_us: Optional[int] = None
+    ) -> int:
+        """This function is used to keep the network layer current."""
+        if self._coalesced:
+            now = time.monotonic_ns()
+            for to_node, pending in list(self._coalesced.items()):
+                if now >= pending[1]:
+                    self._flush_coalesced(to_node)
+        return super().update(max_frames, max_time_us)
+
+    def send(
+        self,
+        header: RF24NetworkHeader,
+        message: Union[bytes, bytearray],
+        on_ack: Optional[Callable[[int, int, bool], Any]] = None,
+        priority: Optional[int] = None,
+    ) -> bool:
+        """Deliver a message according to the header information. While
+        `coalesce_timeout` is enabled, `True` may only mean the message was held."""
+        return self.write(
+            RF24NetworkFrame(header, message), on_ack=on_ack, priority=priority
+        )
+
+    def send_stream(self, to_node: int, source: Any) -> bool:
+        """Stream an arbitrarily long message as a `NETWORK_EXT_DATA` message."""
+        if not is_address_valid(to_node) or to_node == NETWORK_MULTICAST_ADDR:
+            raise AttributeError("message destined for an invalid address")
+        if to_node == self._addr:
+            return False
+        if to_node in self._coalesced:  # keep the messages in order
+            self._flush_coalesced(to_node)
+        self.frame_buf = RF24NetworkFrame(RF24NetworkHeader(to_node, NETWORK_EXT_DATA))
+        self.frame_buf.header.from_node = self._addr
+        self._ext_source = source
+        try:
+            return self._write(to_node, TX_NORMAL)
+        finally:
+            self._ext_source = None
+
+    def send_bulk(
+        self,
+        to_node: int,
+        message: Union[bytes, bytearray],
+        timeout: Union[float, int] = 5,
+    ) -> bool:
+        """Reliably deliver a large message using a sliding window of frames."""
+        if not is_address_valid(to_node) or to_node == NETWORK_MULTICAST_ADDR:
+            raise AttributeError("message destined for an invalid address")
+        total = max(1, -(-len(message) // _BULK_CHUNK))
+        if total >= 0x8000:
+            raise ValueError("message's length is too large!")
+        if to_node in self._coalesced:  # keep the messages in order
+            self._flush_coalesced(to_node)
+        self._bulk_id = (self._bulk_id + 1) & 0xFF
+        # each frame's state: 0 = not sent, 1 = not acknowledged, 2 = acknowledged
+        states = bytearray(total)
+        base, window = (0, max(1, min(self.bulk_window, _BULK_MAX_WINDOW)))
+        rto = self.route_timeout * 1000000
+        end_timer = timeout * 1000000000 + time.monotonic_ns()
+        while base < total:
+            if time.monotonic_ns() > end_timer:
+                self.bulk_window = window
+                return False
+            burst = [
+                seq for seq in range(base, min(total, base + window)) if not states[seq]
+            ]
+            for i, seq in enumerate(burst):
+                flags = 0x8000 if i == len(burst) - 1 else 0  # request an ACK
+                self._bulk_write(
+                    to_node,
+                    NETWORK_BULK_DATA,
+                    self._bulk_id,
+                    struct.pack("<HH", seq | flags, total)
+                    + message[seq * _BULK_CHUNK : (seq + 1) * _BULK_CHUNK],
+                )
+                states[seq] = 1
+            ack = None
+            ack_timer = time.monotonic_ns() + rto
+            while ack is None and time.monotonic_ns() < ack_timer:
+                if (
+                    self._net_update() == NETWORK_BULK_ACK
+                    and self.frame_buf.header.from_node == to_node
+                    and self.frame_buf.header.reserved == self._bulk_id
+                    and len(self.frame_buf.message) >= 6
+                ):
+                    ack = struct.unpack("<HI", self.frame_buf.message[:6])
+            if ack is None:  # resend all unacknowledged frames in a smaller window
+                window = max(1, window >> 1)
+                for seq in range(base, min(total, base + _BULK_MAX_WINDOW)):
+                    if states[seq] == 1:
+                        states[seq] = 0
+                continue
+            lost = False
+            last = ack[0] - 1  # the highest sequence number known to be received
+            for seq in range(base, min(total, ack[0])):
+                states[seq] = 2
+            for i in range(32):
+                if ack[1] & (1 << i) and ack[0] + 1 + i < total:
+                    states[ack[0] + 1 + i] = 2
+                    last = ack[0] + 1 + i
+            for seq in range(ack[0], max(ack[0], last)):
+                if states[seq] == 1:  # frames are routed in order; this was lost
+                    states[seq] = 0
+                    lost = True
+            base = max(base, ack[0])
+            if lost:
+                window = max(1, window >> 1)
+            elif window < _BULK_MAX_WINDOW:
+                window += 1
+        self.bulk_window = window
+        return True
+
+    def recv_bulk(self, timeout: Union[float, int] = 5) -> Optional[RF24NetworkFrame]:
+        """Receive a message sent with `send_bulk()`."""
+        session = None
+        received, buf = (bytearray(0), bytearray(0))
+        base, total, length = (0, 0, 0)
+        end_timer = timeout * 1000000000 + time.monotonic_ns()
+        while time.monotonic_ns() < end_timer:
+            if (
+                self._net_update() != NETWORK_BULK_DATA
+                or len(self.frame_buf.message) < 4
+            ):
+                continue
+            header = self.frame_buf.header
+            seq, count = struct.unpack("<HH", self.frame_buf.message[:4])
+            if session is None:
+                if not 0 < count < 0x8000:
+                    continue
+                session, total = ((header.from_node, header.reserved), count)
+                received, buf = (bytearray(total), bytearray(total * _BULK_CHUNK))
+                length = total * _BULK_CHUNK
+            elif session != (header.from_node, header.reserved):
+                continue  # only 1 bulk transfer is received at a time
+            ack_requested, seq = (seq & 0x8000, seq & 0x7FFF)
+            if seq >= total:
+                continue
+            if not received[seq]:
+                chunk = self.frame_buf.message[4:]
+                buf[seq * _BULK_CHUNK : seq * _BULK_CHUNK + len(chunk)] = chunk
+                if seq == total - 1:
+                    length = seq * _BULK_CHUNK + len(chunk)
+                received[seq] = 1
+                while base < total and received[base]:
+                    base += 1
+            if ack_requested or base == total:
+                self._bulk_ack(session, base, received)
+            if base == total:
+                break
+        if session is None or base < total:
+            return None
+        # linger to acknowledge any frames resent because an ACK was lost
+        end_timer = self.route_timeout * 1000000 + time.monotonic_ns()
+        while time.monotonic_ns() < end_timer:
+            if (
+                self._net_update() == NETWORK_BULK_DATA
+                and (self.frame_buf.header.from_node, self.frame_buf.header.reserved)
+                == session
+            ):
+                self._bulk_ack(session, base, received)
+        header = RF24NetworkHeader(self._addr, NETWORK_BULK_DATA)
+        header.from_node = session[0]
+        return RF24NetworkFrame(header, buf[:length])
+
+    def _bulk_ack(self, session: tuple, base: int, received: bytearray):
+        """Send a NETWORK_BULK_ACK with a selective acknowledgement bitmap."""
+        bitmap = 0
+        for i in range(32):
+            if base + 1 + i < len(received) and received[base + 1 + i]:
+                bitmap |= 1 << i
+        self._bulk_write(
+            session[0], NETWORK_BULK_ACK, session[1], struct.pack("<HI", base, bitmap)
+        )
+
+    def _bulk_write(
+        self, to_node: int, msg_t: int, bulk_id: int, message: bytes
+    ) -> bool:
+        """Send a frame for the bulk transfer identified by ``bulk_id``."""
+        self.frame_buf = RF24NetworkFrame(RF24NetworkHeader(to_node, msg_t), message)
+        self.frame_buf.header.from_node = self._addr
+        self.frame_buf.header.reserved = bulk_id
+        return self._write(to_node, TX_NORMAL)
 
     def write(
-        self, frame: RF24NetworkFrame, traffic_direct: int = AUTO_ROUTING
+        self,
+        frame: RF24NetworkFrame,
+        traffic_direct: int = AUTO_ROUTING,
+        on_ack: Optional[Callable[[int, int, bool], Any]] = None,
+        priority: Optional[int] = None,
     ) -> bool:
-        """Deliver a network frame."""
+        """Deliver a network frame. While `coalesce_timeout` is enabled, `True` may
+        only mean the frame's message was held."""
         if not isinstance(frame, RF24NetworkFrame):
             raise TypeError("frame expected object of type RF24NetworkFrame.")
         if not is_address_valid(frame.header.to_node):
             raise AttributeError("frame destined for an invalid address")
+        if priority is not None and not 0 <= priority < _TX_PRIORITIES:
+            raise ValueError(
+                "priority must be in range [0, {}]".format(_TX_PRIORITIES - 1)
+            )
         if not self._validate_msg_len(len(frame.message)):
             frame.message = frame.message[:MAX_FRAG_SIZE]
         frame.header.from_node = self._addr
-        return self._pre_write(frame, traffic_direct)
+        if (
+            self.coalesce_timeout
+            and traffic_direct == AUTO_ROUTING
+            and on_ack is None
+            and priority is None
+            and frame.header.message_type <= MAX_USR_DEF_MSG_TYPE
+            and not frame.is_ack_type()
+            and len(frame.message) <= MAX_FRAG_SIZE - 2
+            and frame.header.to_node not in (self._addr, NETWORK_MULTICAST_ADDR)
+        ):
+            return self._coalesce(frame)
+        if frame.header.to_node in self._coalesced:  # keep the messages in order
+            self._flush_coalesced(frame.header.to_node)
+        return self._pre_write(frame, traffic_direct, on_ack, priority)
+
+    def _coalesce(self, frame: RF24NetworkFrame) -> bool:
+        """Hold a small message to be combined with others for the same node."""
+        to_node = frame.header.to_node
+        pending = self._coalesced.get(to_node)
+        size = 2 + len(frame.message)  # each message is prefixed with its type & length
+        if pending is not None and len(pending[0]) + size > MAX_FRAG_SIZE:
+            self._flush_coalesced(to_node)
+            pending = None
+        if pending is None:
+            deadline = self.coalesce_timeout * 1000000 + time.monotonic_ns()
+            pending = [bytearray(), deadline, frame.header.frame_id]
+            self._coalesced[to_node] = pending
+        pending[0] += bytes([frame.header.message_type, len(frame.message)])
+        pending[0] += frame.message
+        return True
+
+    def _flush_coalesced(self, to_node: int) -> bool:
+        """Send the messages held for a node in 1 `NETWORK_COALESCED` frame."""
+        messages, _, frame_id = self._coalesced.pop(to_node)
+        header = RF24NetworkHeader(to_node, NETWORK_COALESCED)
+        if messages[1] + 2 == len(messages):  # only 1 message; send it as is
+            header.message_type = messages[0]
+            messages = messages[2:]
+        header.from_node, header.frame_id = (self._addr, frame_id)
+        self.frame_buf = RF24NetworkFrame(header, messages)
+        if self._write(to_node, TX_NORMAL):
+            return True
+        self.coalesce_failures += 1
+        return False
 
     def _pre_write(
-        self, frame: RF24NetworkFrame, traffic_direct: int = AUTO_ROUTING
+        self,
+        frame: RF24NetworkFrame,
+        traffic_direct: int = AUTO_ROUTING,
+        on_ack: Optional[Callable[[int, int, bool], Any]] = None,
+        priority: Optional[int] = None,
     ) -> bool:
         """Helper to do prep work for _write_to_pipe(); like to TMRh20's _write()"""
         self.frame_buf = frame
+        write_direct, send_type = (self.frame_buf.header.to_node, TX_NORMAL)
         if traffic_direct != AUTO_ROUTING:
             # Payload is multicast to the first node, and routed normally to the next
-            send_type = TX_LOGICAL
+            write_direct, send_type = (traffic_direct, TX_LOGICAL)
             if self.frame_buf.header.to_node == NETWORK_MULTICAST_ADDR:
                 send_type = TX_MULTICAST
             if self.frame_buf.header.to_node == traffic_direct:
                 # Payload is multicast to the first node, which is the recipient
                 send_type = TX_PHYSICAL
-            return self._write(traffic_direct, send_type)
-        return self._write(self.frame_buf.header.to_node, TX_NORMAL)
+        if priority is not None:
+            return self._enqueue_tx(write_direct, send_type, priority, on_ack)
+        return self._write(write_direct, send_type, on_ack)
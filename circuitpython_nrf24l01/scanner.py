@@ -0,0 +1,137 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2019 Brendan Doherty
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""A module for surveying channel occupancy with the radio's Received Power Detector"""
+
+import time
+from array import array
+
+try:
+    from typing import Union, Sequence, Optional, List
+except ImportError:
+    pass
+try:
+    import numpy as np  # type: ignore[import]
+except ImportError:
+    np = None
+from micropython import const
+from .rf24 import RF24
+
+_RPD_SETTLE = const(170000)  # ns needed in RX mode for a valid RPD measurement
+
+
+class ChannelScanner:
+    """A class that counts signals detected on channels over repeated sweeps."""
+
+    def __init__(self, radio: RF24, channels: Optional[Sequence[int]] = None):
+        if channels is None:
+            channels = range(126)
+        if not len(channels):
+            raise ValueError("channels cannot be empty")
+        for channel in channels:
+            if not 0 <= channel <= 125:
+                raise ValueError("channels can only be in range [0, 125]")
+        if len(set(channels)) != len(channels):
+            raise ValueError("channels cannot contain duplicates")
+        self._radio = radio
+        self._channels = bytes(channels)
+        if np is not None:
+            self._counts = np.zeros(126, dtype=np.uint32)
+            self._index = np.frombuffer(self._channels, dtype=np.uint8)
+        else:
+            self._counts = array("L", [0] * 126)
+        self._hits = bytearray(len(self._channels))
+        #: The number of sweeps accumulated in `counts`.
+        self.sweeps: int = 0
+
+    @property
+    def channels(self) -> bytes:
+        """The channels that are visited on each sweep. (read-only)"""
+        return self._channels
+
+    @property
+    def counts(self):
+        """The number of sweeps that detected a signal for each of the 126 channels.
+        (read-only)"""
+        return self._counts
+
+    def reset(self):
+        """Discard all accumulated counts."""
+        for i in range(126):
+            self._counts[i] = 0
+        self.sweeps = 0
+
+    def histogram(self) -> Union[List[float], "np.ndarray"]:
+        """Return the fraction of sweeps that detected a signal for each channel."""
+        sweeps = max(1, self.sweeps)
+        if np is not None:
+            return self._counts / sweeps
+        return [count / sweeps for count in self._counts]
+
+    def quietest(self, count: int = 1) -> List[int]:
+        """Return the scanned channels with the fewest detected signals."""
+        return sorted(self._channels, key=lambda ch: self._counts[ch])[:count]
+
+    def sweep(self) -> int:
+        """Visit each channel once and return how many detected a signal."""
+        radio = self._radio
+        ce_pin = radio._ce_pin
+        channel = radio._channel
+        was_rx = radio.listen
+        if not was_rx:
+            radio.listen = True
+        hits = self._hits
+        for i, ch in enumerate(self._channels):
+            ce_pin.value = False
+            if i:  # RPD of the previous channel was latched by clearing CE
+                hits[i - 1] = radio._reg_read(9) & 1
+            radio._reg_write(5, ch)
+            ce_pin.value = True
+            time.sleep(_RPD_SETTLE / 1000000000)
+        ce_pin.value = False
+        hits[-1] = radio._reg_read(9) & 1
+        if radio.update() and radio.irq_dr:
+            # received noise only fills the RX FIFO; it doesn't affect RPD
+            radio.flush_rx()
+            radio.clear_status_flags(True, False, False)
+        radio._reg_write(5, channel)
+        if was_rx:
+            ce_pin.value = True
+        else:
+            radio.listen = False
+        if np is not None:
+            self._counts[self._index] += np.frombuffer(hits, dtype=np.uint8)
+        else:
+            for i, ch in enumerate(self._channels):
+                self._counts[ch] += hits[i]
+        self.sweeps += 1
+        return sum(hits)
+
+    def scan(
+        self, timeout: float = 1, max_sweeps: Optional[int] = None
+    ) -> Union[List[float], "np.ndarray"]:
+        """Sweep the channels repeatedly and return the resulting `histogram()`."""
+        end = time.monotonic_ns() + int(timeout * 1000000000)
+        sweeps = 0
+        while time.monotonic_ns() < end and (max_sweeps is None or sweeps < max_sweeps):
+            self.sweep()
+            sweeps += 1
+        return self.histogram()
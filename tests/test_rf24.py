@@ -224,6 +224,58 @@ def test_load_ack(rf24_obj: RF24, pipe: int, buf: bytes):
     assert not rf24_obj.load_ack(buf, pipe)
 
 
+def test_queue_ack(rf24_obj: RF24):
+    """test queue_ack() and last_ack attribute"""
+    state = rf24_obj._spi._spi.state
+    rf24_obj.flush_tx()
+    for buf in (b"a", b"b", b"c", b"d"):
+        assert rf24_obj.queue_ack(buf, 2)
+    assert rf24_obj.queue_ack(b"x", 1)
+    assert state.tx_fifo == [b"a", b"b", b"c"]  # only 3 fit in the TX FIFO
+    for _ in range(7):
+        rf24_obj.queue_ack(b"y", 1)
+    assert not rf24_obj.queue_ack(b"z", 1)  # pipe 1's queue is full
+    assert rf24_obj.last_ack is None
+
+    # pretend the first ACK payload was sent in response to a payload on pipe 2
+    state.tx_fifo.pop(0)
+    state.registers[7][0] &= 0xFE
+    state.registers[0x17][0] &= 0xDF
+    inject_rx_fifo(rf24_obj)
+    assert rf24_obj.update() and rf24_obj.pipe == 2
+    assert rf24_obj.read() == bytearray(b"\xff" * 32)
+    assert rf24_obj.last_ack == b"a"
+    # the freed slot is given to the next pipe in turn
+    assert state.tx_fifo == [b"b", b"c", b"x"]
+    rf24_obj.flush_tx()
+    state.rx_fifo.clear()
+
+
+def test_queue_ack_no_ack(rf24_obj: RF24):
+    """test last_ack for payloads that were sent with ask_no_ack"""
+    state = rf24_obj._spi._spi.state
+    rf24_obj.flush_tx()
+    for buf in (b"a", b"b", b"c"):
+        assert rf24_obj.queue_ack(buf, 2)
+    # the TX FIFO is still full; the payload was not acknowledged
+    inject_rx_fifo(rf24_obj)
+    assert rf24_obj.read() and rf24_obj.last_ack is None
+    assert state.tx_fifo == [b"a", b"b", b"c"]
+    rf24_obj.flush_tx()
+    assert rf24_obj.queue_ack(b"d", 2) and state.tx_fifo == [b"d"]
+    inject_rx_fifo(rf24_obj)  # the TX FIFO is not empty; "d" was not sent
+    assert rf24_obj.read() and rf24_obj.last_ack is None
+    assert state.tx_fifo == [b"d"]
+
+    # pretend "d" was sent in response to a payload on pipe 2
+    state.tx_fifo.pop(0)
+    state.registers[0x17][0] |= 0x10
+    inject_rx_fifo(rf24_obj)
+    assert rf24_obj.read() and rf24_obj.last_ack == b"d"
+    rf24_obj.flush_tx()
+    state.rx_fifo.clear()
+
+
 @pytest.mark.parametrize("enable", [True, False])
 def test_allow_ask_no_ack(rf24_obj: RF24, enable: bool):
     """test allow_ask_no_ack attribute"""
@@ -345,3 +397,82 @@ def test_fifo_state(
     """check the fifo state is accurately described"""
     rf24_obj._spi._spi.state.registers[0x17][0] = reg_val
     assert expected == rf24_obj.fifo(about_tx=about_tx, check_empty=check_empty)
+
+
+@pytest.mark.parametrize("force_retry", [0, 2])
+def test_send_many(rf24_obj: RF24, force_retry: int):
+    """test send_many()"""
+    state = rf24_obj._spi._spi.state
+    sent = []
+
+    def transmit():
+        """Pretend the TX FIFO is sent (until a payload fails) while CE is high."""
+        while rf24_obj._ce_pin.value and state.tx_fifo:
+            if state.registers[7][0] & 0x10:
+                return
+            address = bytes(state.registers[0x10][:3])
+            sent.append((address, bytes(state.tx_fifo[0])))
+            if address == b"bad":
+                state.registers[7][0] |= 0x10
+                return
+            state.tx_fifo.pop(0)
+            state.registers[7][0] |= 0x20
+            if not state.tx_fifo:
+                state.registers[0x17][0] |= 0x10
+
+    def upload(payload):
+        """Put the payload in the TX FIFO."""
+        status_byte = state.registers[7][0]
+        state.tx_fifo.append(payload)
+        state.registers[0x17][0] &= 0xCF
+        transmit()
+        return bytearray([status_byte]) + (b"\0" * len(payload))
+
+    class CePin:
+        """A CE pin that starts transmitting on a rising edge."""
+
+        def __init__(self):
+            self._value = False
+
+        @property
+        def value(self):
+            return self._value
+
+        @value.setter
+        def value(self, val):
+            rising = val and not self._value
+            self._value = val
+            if rising:
+                transmit()
+
+    addresses = []
+    open_tx_pipe = rf24_obj.open_tx_pipe
+
+    def count_address(address):
+        addresses.append(bytes(address))
+        open_tx_pipe(address)
+
+    rf24_obj.address_length = 3
+    rf24_obj.dynamic_payloads = True
+    rf24_obj.open_tx_pipe(b"two")
+    rf24_obj.open_tx_pipe = count_address  # type: ignore[method-assign]
+    rf24_obj._ce_pin = CePin()
+    state.commands[0xA0] = upload
+    pairs = [
+        (b"one", b"a"),
+        (b"two", b"b"),
+        (b"bad", b"c"),
+        (b"one", b"d"),
+        (b"two", b"e"),
+    ]
+    try:
+        results = rf24_obj.send_many(pairs, force_retry=force_retry, send_only=True)
+    finally:
+        state.commands[0xA0] = type(state).write_payload
+        state.registers[7][0] &= 0x0F
+    assert results == [True, True, False, True, True]
+    # the current address goes first, then each address is set only once;
+    # payloads keep their given order per address
+    assert addresses == [b"bad", b"one"]
+    payloads = [b"b", b"e"] + [b"c"] * (force_retry + 1) + [b"a", b"d"]
+    assert [pl for _, pl in sent] == payloads
@@ -1,10 +1,24 @@
 """Test RF24Mesh class"""
 
+import struct
+import time
 from pathlib import Path
 from typing import Dict
 import pytest
-from circuitpython_nrf24l01.rf24_mesh import RF24Mesh
-from circuitpython_nrf24l01.network.constants import NETWORK_DEFAULT_ADDR
+from circuitpython_nrf24l01.rf24 import RF24
+from circuitpython_nrf24l01.rf24_mesh import RF24Mesh, RF24MeshNoMaster
+from circuitpython_nrf24l01.network.constants import (
+    NETWORK_DEFAULT_ADDR,
+    MESH_ADDR_REQUEST,
+    MESH_ADDR_RESPONSE,
+    NETWORK_PING,
+    MESH_ID_LOOKUP,
+    MESH_ADDR_LOOKUP,
+    MESH_ADDR_CHANGE,
+    NETWORK_MULTICAST_ADDR,
+    MESH_BATCH_LOOKUP,
+    NETWORK_POLL,
+)
 
 
 @pytest.mark.parametrize("dhcp_dict", [{2: 0o5}])
@@ -30,6 +44,393 @@ def test_dhcp_persistence(
     assert mesh_obj.dhcp_dict == dhcp_dict
 
 
+def test_dhcp_dict(mesh_obj: RF24Mesh):
+    """test lookups and assignments on the master's DHCP table"""
+    mesh_obj.dhcp_dict = {2: 0o5, 3: 0o4}
+    assert mesh_obj.lookup_address(2) == 0o5
+    assert mesh_obj.lookup_node_id(0o4) == 3
+    mesh_obj.set_address(4, 0o5, search_by_address=True)
+    assert mesh_obj.dhcp_dict == {3: 0o4, 4: 0o5}
+    assert mesh_obj.lookup_address(2) == -2
+    assert mesh_obj.release_address(0o4) and not mesh_obj.release_address(0o4)
+    assert mesh_obj.lookup_node_id(0o4) == -2
+
+
+def test_dhcp_journal(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, mesh_obj: RF24Mesh
+):
+    """test recording DHCP changes in an append-only journal"""
+    monkeypatch.chdir(str(tmp_path))
+    journal = tmp_path / "dhcp.journal"
+    mesh_obj.dhcp_epoch = 0x1234
+    mesh_obj.set_address(2, 0o5)
+    mesh_obj.open_dhcp_journal()
+    assert journal.read_bytes() == b"DHCJ\x01\x00\x34\x12\x02\xf8\x05\x00"
+    mesh_obj.set_address(3, 0o4)
+    mesh_obj.set_address(4, 0o5)  # takes 0o5 from node 2
+    mesh_obj.release_address(0o4)
+    assert journal.stat().st_size == 12 + 3 * 4  # appended without a rewrite
+    expected = mesh_obj.dhcp_dict.copy()
+    mesh_obj.close_dhcp_journal()
+    with open(str(journal), "ab") as file:
+        file.write(b"\x06\x00\x01")  # an incomplete record is ignored
+    mesh_obj.dhcp_dict = {}
+    mesh_obj.dhcp_epoch = 0
+    mesh_obj.open_dhcp_journal()
+    assert mesh_obj.dhcp_dict == expected == {4: 0o5}
+    assert mesh_obj.dhcp_epoch == 0x1234
+    assert journal.stat().st_size == 12  # compacted when opened
+
+    for n_id in range(5, 5 + 80):
+        mesh_obj.set_address(n_id, 0o1)
+    assert journal.stat().st_size < 8 + 80 * 4  # compacted automatically
+    mesh_obj.close_dhcp_journal()
+    mesh_obj.dhcp_dict = {}
+    mesh_obj.open_dhcp_journal()
+    assert mesh_obj.dhcp_dict == {4: 0o5, 84: 0o1}
+    mesh_obj.close_dhcp_journal()
+    assert not (tmp_path / "dhcp.journal.tmp").exists()
+
+    journal.write_bytes(b"DHCJ\x02\x00\x34\x12\x02\xf8\x05\x00")  # a newer version
+    with pytest.raises(ValueError):
+        mesh_obj.open_dhcp_journal()
+    assert journal.stat().st_size == 12  # not overwritten
+
+
+def test_map_dhcp(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, mesh_obj: RF24Mesh):
+    """test keeping the dhcp_dict in a memory-mapped file"""
+    monkeypatch.chdir(str(tmp_path))
+    mesh_obj.lease_time = 60
+    mesh_obj.set_address(2, 0o5)  # copied into the file
+    mesh_obj.map_dhcp()
+    assert mesh_obj.dhcp_dict == {2: 0o5} and mesh_obj.lease_time == 60
+    mesh_obj.set_address(3, 0o4)
+    mesh_obj.dhcp_dict.close()
+
+    mesh_obj.dhcp_dict = {}
+    mesh_obj.set_address(4, 0o5)  # takes 0o5 from node 2 in the file
+    mesh_obj.open_dhcp_journal()
+    mesh_obj.map_dhcp()
+    expected = {3: 0o4, 4: 0o5}
+    assert mesh_obj.dhcp_dict == expected and mesh_obj.lookup_address(3) == 0o4
+    mesh_obj.close_dhcp_journal()
+    mesh_obj.dhcp_dict.close()
+    mesh_obj.dhcp_dict = {}
+    mesh_obj.open_dhcp_journal()  # the journal matches the mapped file
+    assert mesh_obj.dhcp_dict == expected
+    mesh_obj.close_dhcp_journal()
+
+
+def test_dhcp(mesh_obj: RF24Mesh, monkeypatch: pytest.MonkeyPatch):
+    """test address allocation when the master receives MESH_ADDR_REQUEST"""
+    responses = []
+
+    def pseudo_write(to_node, directive):
+        header = mesh_obj.frame_buf.header
+        assert header.message_type == MESH_ADDR_RESPONSE
+        address, epoch = struct.unpack("<HH", mesh_obj.frame_buf.message)
+        assert epoch == mesh_obj.dhcp_epoch
+        responses.append((to_node, address))
+        return True
+
+    monkeypatch.setattr(mesh_obj, "_write", pseudo_write)
+
+    def request(node_id: int, via_node: int):
+        header = mesh_obj.frame_buf.header
+        header.from_node, header.to_node = (via_node, 0)
+        header.message_type, header.reserved = (MESH_ADDR_REQUEST, node_id)
+        mesh_obj._do_dhcp = True
+        mesh_obj._dhcp()
+        return responses[-1]
+
+    assert request(2, NETWORK_DEFAULT_ADDR) == (NETWORK_DEFAULT_ADDR, 0o5)
+    assert request(2, NETWORK_DEFAULT_ADDR) == (NETWORK_DEFAULT_ADDR, 0o5)
+    for n_id in range(3, 7):
+        assert request(n_id, 0o5)[1] == 0o45 - (n_id - 3) * 0o10
+    # parent 0o5 is full, so the requesting node is told to try another contact
+    assert request(7, 0o5) == (0o5, NETWORK_DEFAULT_ADDR)
+    assert mesh_obj.lookup_address(7) == -2
+
+
+def test_lease_time(mesh_obj: RF24Mesh, monkeypatch: pytest.MonkeyPatch):
+    """test the master reclaims addresses of nodes that were not heard from"""
+    clock = [0.0]
+    monkeypatch.setattr(time, "monotonic", lambda: clock[0])
+    mesh_obj.lease_time = 30
+    mesh_obj.set_address(2, 0o5)
+    mesh_obj.set_address(3, 0o4)
+    clock[0] = 20
+    mesh_obj.frame_buf.header.from_node = 0o4
+    mesh_obj._handle_frame_for_other_node(NETWORK_PING)  # traffic renews the lease
+    clock[0] = 30
+    mesh_obj.update()
+    assert mesh_obj.dhcp_dict == {3: 0o4}
+
+
+def test_lookup_cache(spi_obj, monkeypatch: pytest.MonkeyPatch):
+    """test the lookup cache of non-master nodes"""
+    node = RF24MeshNoMaster(*spi_obj, node_id=2)
+    node._begin(0o5)
+    table = {3: 0o15, 4: 0o25, 5: 0o35}
+    reachable = {0o15, 0o25, 0o35}
+    requests = []
+
+    def lookup_2_master(number: int, lookup_type: int) -> int:
+        requests.append(number)
+        if lookup_type == MESH_ID_LOOKUP:
+            return {addr: n_id for n_id, addr in table.items()}.get(number, -2)
+        return table.get(number, -2)
+
+    monkeypatch.setattr(node, "_lookup_2_master", lookup_2_master)
+    monkeypatch.setattr(node, "write", lambda to_node, *_: to_node in reachable)
+    node.lookup_cache_size = 2
+    assert node.lookup_address(3) == 0o15 and node.lookup_address(3) == 0o15
+    assert node.lookup_node_id(0o15) == 3 and requests == [3]
+    assert node.lookup_node_id(0o25) == 4  # cached by address too
+    assert node.lookup_address(4) == 0o25 and requests == [3, 0o25]
+    assert node.lookup_address(6) == -2  # failures are not cached
+    assert node.send(5, 1, b"")  # evicts 3 (least recently used)
+    assert node.lookup_address(3) == 0o15 and requests == [3, 0o25, 6, 5, 3]
+    table[5] = 0o45  # node 5 moved
+    reachable = {0o45}
+    assert node.send(5, 1, b"") is False  # delivery failure forgets the address
+    assert node.send(5, 1, b"") and requests[-1] == 5
+    requests.clear()
+    node.lookup_cache_ttl = 0
+    node.clear_lookup_cache()
+    assert node.lookup_address(4) == 0o25 and node.lookup_address(4) == 0o25
+    assert requests == [4, 4]
+
+
+def test_check_connection_uncached(spi_obj, monkeypatch: pytest.MonkeyPatch):
+    """test that pinging the master node is not answered by the lookup cache"""
+    node = RF24MeshNoMaster(*spi_obj, node_id=2)
+    node._begin(0o5)
+    master = {"online": True}
+    answers = []
+
+    def write(to_node: int, *_) -> bool:
+        assert not to_node and node.frame_buf.header.message_type == MESH_ADDR_LOOKUP
+        if master["online"]:
+            answers.append(struct.pack("<h", 0o5))
+        return master["online"]
+
+    def net_update(*_) -> int:
+        if not answers:
+            return 0
+        node.frame_buf.message = answers.pop(0)
+        return MESH_ADDR_LOOKUP
+
+    monkeypatch.setattr(node, "_write", write)
+    monkeypatch.setattr(node, "_net_update", net_update)
+    assert node.lookup_address(2) == 0o5  # now cached
+    assert node.check_connection(ping_master=True)
+    master["online"] = False
+    assert node.lookup_address(2) == 0o5
+    assert not node.check_connection(attempts=1, ping_master=True)
+
+
+def test_dhcp_multicast(spi_obj, mesh_obj: RF24Mesh, monkeypatch: pytest.MonkeyPatch):
+    """test the replica of the master's DHCP table on non-master nodes"""
+    sent = []
+    monkeypatch.setattr(
+        mesh_obj, "multicast", lambda msg, msg_t, lvl: sent.append(bytes(msg))
+    )
+    mesh_obj.set_address(9, 0o4)  # not multicasted
+    mesh_obj.dhcp_multicast = True
+    for n_id in range(3, 12):
+        mesh_obj.set_address(n_id, n_id - 2)
+    mesh_obj.set_address(3, 0o11)  # changes are sent in the order of the last change
+    mesh_obj.release_address(0o4)
+    mesh_obj.update()
+    assert [len(msg) for msg in sent] == [22, 7] and [msg[0] for msg in sent] == [0, 1]
+    assert sent[1][-6:] == struct.pack("<BHBH", 3, 0o11, 6, 0xFFFF)
+
+    node = RF24MeshNoMaster(*spi_obj, node_id=2)
+    node._begin(0o5)
+    monkeypatch.setattr(node, "_lookup_2_master", lambda *_: -1)
+
+    def receive(msg: bytes):
+        node.frame_buf.header.to_node = NETWORK_MULTICAST_ADDR
+        node.frame_buf.header.from_node = 0
+        node.frame_buf.header.frame_id += 1
+        node.frame_buf.header.message_type = MESH_ADDR_CHANGE
+        node.frame_buf.message = msg
+        assert node._handle_frame_for_other_node(MESH_ADDR_CHANGE) == (
+            True,
+            MESH_ADDR_CHANGE,
+        )
+
+    for msg in sent:
+        receive(msg)
+    assert node.lookup_address(3) == 0o11 and node.lookup_node_id(0o11) == 3
+    assert node.lookup_address(11) == -1  # 0o11 was taken from node 11
+    assert node.lookup_address(6) == -1 and node.lookup_address(7) == 5
+    assert not len(node.queue)  # not given to the user
+    receive(bytes([3]) + struct.pack("<BH", 10, 0o21))  # sequence number 2 was missed
+    assert node.lookup_address(10) == 0o21 and node.lookup_address(7) == -1
+    receive(b"")  # malformed changes are ignored
+    receive(bytes([4]) + struct.pack("<BH", 10, 0o31)[:2])
+    assert node.lookup_address(10) == 0o21 and node._replica_seq == 3
+
+
+def test_lookup_addresses(spi_obj, mesh_obj: RF24Mesh, monkeypatch: pytest.MonkeyPatch):
+    """test resolving several node IDs with batched lookups"""
+    for n_id in range(1, 31):
+        mesh_obj.set_address(n_id, n_id + 0o100)
+    node = RF24MeshNoMaster(*spi_obj, node_id=40)
+    node._begin(0o5)
+    node.clear_lookup_cache()
+    requests, responses = ([], [])
+
+    def master_write(to_node: int, *_) -> bool:
+        assert to_node == 0o5
+        responses.append(bytes(mesh_obj.frame_buf.message))
+        return True
+
+    def node_write(to_node: int, *_) -> bool:
+        assert not to_node and node.frame_buf.header.message_type == MESH_BATCH_LOOKUP
+        requests.append(bytes(node.frame_buf.message))
+        mesh_obj.frame_buf.header.from_node = 0o5
+        mesh_obj.frame_buf.message = node.frame_buf.message
+        mesh_obj._answer_batch_lookup()
+        return True
+
+    def net_update(*_) -> int:
+        if not responses:
+            return 0
+        node.frame_buf.message = responses.pop(0)
+        return MESH_BATCH_LOOKUP
+
+    monkeypatch.setattr(mesh_obj, "_write", master_write)
+    monkeypatch.setattr(node, "_write", node_write)
+    monkeypatch.setattr(node, "_net_update", net_update)
+    node._cache_lookup(1, 0o101)
+    node_ids = [0] + list(range(1, 36)) + [3]
+    expected = {n_id: n_id + 0o100 if n_id <= 30 else -2 for n_id in range(1, 36)}
+    expected[0] = 0
+    assert node.lookup_addresses(node_ids) == expected
+    assert [len(req) for req in requests] == [24, 10]  # node 1 was cached
+    assert node.lookup_address(30) == 0o136 and len(requests) == 2  # cached
+    assert mesh_obj.lookup_addresses([0, 2, 40]) == {0: 0, 2: 0o102, 40: -2}
+
+    requests.clear()
+    monkeypatch.setattr(node, "_net_update", lambda *_: 0)
+    assert node.lookup_addresses([41, 42]) == {41: -1, 42: -1}  # no response
+    assert requests == [bytes([41, 42])]
+
+
+@pytest.mark.parametrize("late_full", [False, True])
+def test_renew_address(spi_obj, monkeypatch: pytest.MonkeyPatch, late_full: bool):
+    """test polling all network levels at once and ranking the responders"""
+    node = RF24MeshNoMaster(*spi_obj, node_id=7)
+    node.join_poll_timeout, node.join_request_timeout = (10, 10)
+    writes, lookups = ([], [])
+    incoming = [
+        (4, NETWORK_POLL, 0, b""),  # weak signal
+        (4, NETWORK_POLL, 0o12, b""),
+        (4, NETWORK_POLL, 0o1, b""),
+        (5, MESH_ADDR_RESPONSE, 0o1, struct.pack("<H", NETWORK_DEFAULT_ADDR)),
+        (7, MESH_ADDR_RESPONSE, 0, struct.pack("<H", 0o212)),  # answers 0o12 late
+    ]
+    contacts = [0o1, 0o12, 0]
+    if late_full:  # 0o1 is full, but says so while 0o12 is being asked
+        incoming[3:] = [
+            (6, MESH_ADDR_RESPONSE, 0o1, struct.pack("<H", NETWORK_DEFAULT_ADDR)),
+            (6, MESH_ADDR_RESPONSE, 0o12, struct.pack("<H", 0o212)),
+        ]
+        contacts = contacts[:2]
+    signals = iter([False, True, True])
+
+    def write(to_node: int, *_) -> bool:
+        writes.append((to_node, node.frame_buf.header.message_type))
+        return True
+
+    def net_update(*_) -> int:
+        if not incoming or incoming[0][0] > len(writes):
+            return 0
+        _, msg_t, from_node, message = incoming.pop(0)
+        node.frame_buf.header.message_type = msg_t
+        node.frame_buf.header.from_node = from_node
+        node.frame_buf.header.reserved = node.node_id
+        node.frame_buf.message = message
+        return msg_t
+
+    def lookup_2_master(number: int, _) -> int:
+        lookups.append(number)
+        return node.node_id
+
+    monkeypatch.setattr(node, "_write", write)
+    monkeypatch.setattr(node, "_net_update", net_update)
+    monkeypatch.setattr(node, "_lookup_2_master", lookup_2_master)
+    monkeypatch.setattr(RF24, "rpd", property(lambda _: next(signals)))
+    assert node.renew_address(1) == 0o212 and node.node_address == 0o212
+    assert writes[:4] == [(0, NETWORK_POLL), (1, NETWORK_POLL)] + [
+        (0o10, NETWORK_POLL),
+        (0o100, NETWORK_POLL),
+    ]
+    assert [w[0] for w in writes[4:]] == contacts  # strongest & closest first
+    assert lookups == [0o212]  # verified once
+    assert node.join_timings["attempts"] == 1
+    assert node.join_timings["total"] >= node.join_timings["poll"] > 0
+
+
+def test_fast_rejoin(spi_obj, mesh_obj: RF24Mesh, monkeypatch: pytest.MonkeyPatch):
+    """test reusing a persisted lease with 1 verification round-trip"""
+    node = RF24MeshNoMaster(*spi_obj, node_id=7)
+    with pytest.raises(ValueError):
+        node.lease = struct.pack("<HHH", 0o12, 0o1, 0)  # wrong parent
+    with pytest.raises(ValueError):
+        node.lease = b"\x01\x00"
+    node.lease = struct.pack("<HHH", 0o12, 0o2, 1)
+    master = {"addr": 0o12, "epoch": 2}
+    lookups = []
+
+    def write(to_node: int, *_) -> bool:
+        assert not to_node and node.frame_buf.header.message_type == MESH_ADDR_LOOKUP
+        lookups.append(node.frame_buf.message[0])
+        return True
+
+    def net_update(*_) -> int:
+        node.frame_buf.message = struct.pack("<hH", master["addr"], master["epoch"])
+        return MESH_ADDR_LOOKUP
+
+    monkeypatch.setattr(node, "_write", write)
+    monkeypatch.setattr(node, "_net_update", net_update)
+    node._cache_lookup(3, 0o3)
+    assert node.renew_address(1) == 0o12 and lookups == [7]
+    assert node.lease == struct.pack("<HHH", 0o12, 0o2, 2)  # epoch was updated
+    assert not node._lookup_cache  # the master node restarted
+    assert node.join_timings["attempts"] == 0 and node.join_timings["poll"] == 0
+
+    # the master node assigned the address to another node, so renew fully
+    master["addr"] = -2
+    requested = []
+    monkeypatch.setattr(node, "_request_address", lambda: requested.append(1))
+    assert node.renew_address(0) is None and requested == [1]
+    assert node.node_address == NETWORK_DEFAULT_ADDR
+    node.lease = None
+    assert node.renew_address(0) is None and lookups == [7, 7]
+
+    # the master node answers with the address (or -2) and its epoch
+    answers = []
+
+    def master_update(*_) -> int:
+        mesh_obj.frame_buf.header.from_node = 0o12
+        mesh_obj.frame_buf.message = bytes([answers and 8 or 7])
+        return MESH_ADDR_LOOKUP
+
+    monkeypatch.setattr(mesh_obj, "_net_update", master_update)
+    monkeypatch.setattr(
+        mesh_obj, "_write", lambda *_: answers.append(mesh_obj.frame_buf.message)
+    )
+    mesh_obj.set_address(7, 0o12)
+    mesh_obj.dhcp_epoch = 5
+    mesh_obj.update()
+    mesh_obj.update()
+    assert answers == [struct.pack("<hH", 0o12, 5), struct.pack("<hH", -2, 5)]
+
+
 @pytest.mark.parametrize("_id", [2, 255, 450])
 def test_node_id(mesh_obj: RF24Mesh, _id: int):
     """test node_id attribute"""
@@ -1,5 +1,10 @@
 """Tests related to the RF24Network class."""
 
+import io
+import math
+import time
+import threading
+from collections import deque
 from typing import Optional, Union, Tuple
 import pytest
 from circuitpython_nrf24l01.rf24_network import RF24Network
@@ -9,11 +14,21 @@ from circuitpython_nrf24l01.network.structs import (
     FrameQueueFrag,
     RF24NetworkFrame,
     RF24NetworkHeader,
+    is_address_valid,
 )
 from circuitpython_nrf24l01.network.constants import (
     MAX_FRAG_SIZE,
     AUTO_ROUTING,
     NETWORK_MULTICAST_ADDR,
+    NETWORK_EXT_DATA,
+    MSG_FRAG_FIRST,
+    MSG_FRAG_LAST,
+    NETWORK_BULK_DATA,
+    NETWORK_ACK,
+    NETWORK_COALESCED,
+    NETWORK_OVERRUN,
+    TX_NORMAL,
+    TX_MULTICAST,
 )
 
 
@@ -260,3 +275,409 @@ def test_multicast(net_obj: RF24Network, level: Optional[int], size: int):
     net_obj.fragmentation = False
     net_obj.max_message_length = MAX_FRAG_SIZE * 2
     assert net_obj.multicast(b"\0" * size, "T", level)
+
+
+@pytest.mark.parametrize(
+    "length", [1, 144, MAX_FRAG_SIZE * 255, pytest.param(0, marks=pytest.mark.xfail)]
+)
+def test_max_message_length(net_obj: RF24Network, length: int):
+    """test max_message_length attribute"""
+    net_obj.max_message_length = length
+    assert net_obj.max_message_length == length
+    assert isinstance(net_obj.queue, FrameQueueFrag)
+    assert net_obj.queue.max_message_length == length
+
+
+@pytest.mark.parametrize("size", [0, MAX_FRAG_SIZE, MAX_FRAG_SIZE * 300 + 1])
+@pytest.mark.parametrize("as_file", [True, False])
+def test_send_stream(net_obj: RF24Network, size: int, as_file: bool):
+    """test send_stream()"""
+    message = bytes(i & 0xFF for i in range(size))
+    tx_fifo = net_obj._rf24._spi._spi.state.tx_fifo
+    tx_fifo.clear()
+    assert net_obj.send_stream(0o4, io.BytesIO(message) if as_file else message)
+    headers = [RF24NetworkHeader() for _ in tx_fifo]
+    for header, buf in zip(headers, tx_fifo):
+        header.unpack(buf)
+    assert headers[0].message_type == MSG_FRAG_FIRST and not headers[0].reserved
+    assert headers[-1].message_type == MSG_FRAG_LAST
+    assert headers[-1].reserved == NETWORK_EXT_DATA
+    assert b"".join(buf[8:] for buf in tx_fifo) == message
+    # the stream is consumed; subsequent writes are not affected
+    assert net_obj._ext_source is None
+
+    # feed the transmitted fragments to a receiving queue's sink
+    received = []
+    queue = FrameQueueFrag()
+    queue.ext_data_sink = lambda frame: received.append(frame.message)
+    for buf in tx_fifo:
+        frame = RF24NetworkFrame()
+        frame.unpack(buf)
+        assert queue.enqueue(frame)
+    assert frame.header.message_type == NETWORK_EXT_DATA
+    assert b"".join(received) == message and not len(queue)
+
+
+def test_bulk_transfer(spi_obj, monkeypatch: pytest.MonkeyPatch):
+    """test send_bulk() and recv_bulk() between 2 (loop-backed) network nodes"""
+    sender = RF24Network(*spi_obj, node_address=0)
+    receiver = RF24Network(*spi_obj, node_address=0o1)
+    inboxes = {id(sender): deque(), id(receiver): deque()}
+    dropped = set()
+
+    def loop_back(src: RF24Network, dest: RF24Network):
+        def pseudo_send(buf, ask_no_ack=False, send_only=False):
+            header = RF24NetworkHeader()
+            header.unpack(buf)
+            seq = buf[8] | (buf[9] & 0x7F) << 8
+            if header.message_type == NETWORK_BULK_DATA and seq in (2, 9):
+                if seq not in dropped:  # lose these frames once
+                    dropped.add(seq)
+                    return True
+            inboxes[id(dest)].append(bytearray(buf))
+            return True
+
+        def pseudo_read():
+            return inboxes[id(src)].popleft() if inboxes[id(src)] else None
+
+        monkeypatch.setattr(src._rf24, "send", pseudo_send)
+        monkeypatch.setattr(src._rf24, "read", pseudo_read)
+
+    loop_back(sender, receiver)
+    loop_back(receiver, sender)
+    message = bytes(i & 0xFF for i in range(1000))
+    result = []
+    thread = threading.Thread(
+        target=lambda: result.append(sender.send_bulk(0o1, message)), daemon=True
+    )
+    thread.start()
+    frame = receiver.recv_bulk()
+    thread.join()
+    assert result == [True]
+    assert frame is not None and frame.message == message
+    assert frame.header.from_node == 0 and dropped == {2, 9}
+
+
+@pytest.mark.parametrize("acked", [True, False])
+def test_async_ack(net_obj: RF24Network, monkeypatch: pytest.MonkeyPatch, acked: bool):
+    """test non-blocking NETWORK_ACK tracking with send(on_ack=...)"""
+    results = []
+    header = RF24NetworkHeader(0o11, 65)  # ack type routed via node 0o1
+    assert net_obj.send(header, b"data", on_ack=lambda *args: results.append(args))
+    assert net_obj.pending_acks == 1 and not results
+
+    rx_fifo = []
+    if acked:
+        ack = RF24NetworkHeader(0, NETWORK_ACK)
+        ack.from_node, ack.frame_id = (0, header.frame_id)
+        rx_fifo.append(bytearray(ack.pack()))
+    else:
+        time.sleep(net_obj.route_timeout / 1000 + 0.005)  # expire the NETWORK_ACK
+    monkeypatch.setattr(
+        net_obj._rf24, "read", lambda: rx_fifo.pop() if rx_fifo else None
+    )
+    net_obj.update()
+    assert not net_obj.pending_acks
+    assert results == [(0o11, header.frame_id, acked)]
+
+    # direct transmissions are reported immediately
+    assert net_obj.send(RF24NetworkHeader(0o1, 65), b"", lambda *a: results.append(a))
+    assert results[-1][::2] == (0o1, True)
+
+
+def test_adaptive_timeouts(net_obj: RF24Network):
+    """test the round-trip time estimates used to derive timeouts"""
+    assert net_obj.get_rtt(0o11) is None
+    assert net_obj._timeout(net_obj._route_rtt, 0o11, 75) == 75
+    for sample in (8000, 8000, 12000, 4000):  # in microseconds
+        net_obj._rtt_sample(net_obj._route_rtt, 0o11, sample)
+    srtt, rttvar = net_obj.get_rtt(0o11)
+    assert 7 < srtt < 9 and 1 < rttvar < 4
+    rto = net_obj._timeout(net_obj._route_rtt, 0o11, 75)
+    assert rto == math.ceil(srtt + 4 * rttvar)
+    net_obj._rtt_sample(net_obj._route_rtt, 0o11, 10000000)  # a very slow route
+    assert net_obj._timeout(net_obj._route_rtt, 0o11, 75) == 75 * 4
+    net_obj.adaptive_timeouts = False
+    assert net_obj._timeout(net_obj._route_rtt, 0o11, 75) == 75
+
+    # transmissions to direct links update the link estimates
+    assert net_obj.send(RF24NetworkHeader(0o1, 1), b"")
+    assert net_obj.get_rtt(0o1, routed=False) is not None
+    assert net_obj.get_rtt(0o1) is None
+
+
+def test_adaptive_retries(net_obj: RF24Network):
+    """test the auto-retry delay & count tuned for each next hop"""
+    base = net_obj.get_auto_retries()
+    assert net_obj.get_auto_retries(0o1) == base and net_obj.get_link_stats(0o1) is None
+    assert net_obj.send(RF24NetworkHeader(0o1, 1), b"")
+    assert net_obj.get_link_stats(0o1) == (0, 0)
+    net_obj._link_stats[0o1] = [32, 2]  # 2 retries on average & 2 failures in a row
+    assert net_obj.get_link_stats(0o1) == (2, 2)
+    assert net_obj.get_auto_retries(0o1) == (base[0] + 1000, base[1] + 2)
+    net_obj.adaptive_retries = False
+    assert net_obj.get_auto_retries(0o1) == base
+
+    # the delay must allow for ACK packets at 250 kbps
+    net_obj.set_auto_retries(250, 5)
+    assert net_obj.get_auto_retries(0o1) == (250, 5)
+    net_obj.data_rate = 250
+    assert net_obj.get_auto_retries(0o1) == (500, 5)
+    net_obj.data_rate = 1
+
+
+@pytest.mark.parametrize("multicast_level", [None, 2], ids=["default", "overridden"])
+@pytest.mark.parametrize("node_address", [0, 0o1, 0o12, 0o345, 0o5555])
+def test_route_cache(
+    net_obj: RF24Network, node_address: int, multicast_level: Optional[int]
+):
+    """test the route cache against computing each route with address masks"""
+    net_obj.node_address = node_address
+    if multicast_level is not None:  # doesn't change the node's level in the tree
+        net_obj.multicast_level = multicast_level
+    mask, mask_inv = (net_obj._mask, net_obj._mask_inv)
+    for to_node in range(0o20000):  # includes addresses outside of the cache
+        valid = is_address_valid(to_node)
+        assert net_obj._is_address_valid(to_node) == valid
+        if not valid:
+            continue
+        expected = (net_obj._parent, net_obj._parent_pipe, False)
+        if to_node & mask == node_address:  # to_node is a descendant
+            if not to_node & (mask_inv << 3):  # to_node is a direct child
+                expected = (to_node, 5, False)
+            else:
+                expected = (to_node & ((mask << 3) | 7), 5, False)
+        assert net_obj._logical_2_physical(to_node, TX_NORMAL) == expected
+    assert net_obj._logical_2_physical(0o100, TX_MULTICAST) == (0o100, 0, True)
+
+
+def test_update_budget(net_obj: RF24Network, monkeypatch: pytest.MonkeyPatch):
+    """test update() limits and relaying frames deferred by them"""
+    net_obj.node_address = 0o1
+    rx_fifo, sent = ([], [])
+    for i in range(3):
+        frame = RF24NetworkFrame(RF24NetworkHeader(0o11, 1), bytes([i]))
+        frame.header.from_node = 0
+        rx_fifo.append(bytearray(frame.pack()))
+    monkeypatch.setattr(
+        net_obj._rf24, "read", lambda: rx_fifo.pop(0) if rx_fifo else None
+    )
+    monkeypatch.setattr(
+        net_obj._rf24, "send", lambda buf, *args, **kwargs: sent.append(buf) or True
+    )
+    # forwarding needs more time than the budget allows
+    assert not net_obj.update(max_frames=2, max_time_us=10000)
+    assert len(rx_fifo) == 1 and not sent and net_obj.tx_queue_depth == 2
+    assert net_obj.update() == 0  # relays the deferred frames first
+    assert not rx_fifo and not net_obj.tx_queue_depth
+    assert [buf[-1] for buf in sent] == [0, 1, 2]
+
+
+def test_update_small_budget(net_obj: RF24Network, monkeypatch: pytest.MonkeyPatch):
+    """test a budget smaller than the cost of any frame still makes progress"""
+    net_obj.node_address = 0o1
+    rx_fifo, sent = ([], [])
+    monkeypatch.setattr(
+        net_obj._rf24, "read", lambda: rx_fifo.pop(0) if rx_fifo else None
+    )
+    monkeypatch.setattr(
+        net_obj._rf24, "send", lambda buf, *args, **kwargs: sent.append(buf) or True
+    )
+    for i in range(3):
+        frame = RF24NetworkFrame(RF24NetworkHeader(0o11, 1), bytes([i]))
+        frame.header.from_node = 0
+        rx_fifo.append(bytearray(frame.pack()))
+    net_obj.update(max_time_us=500)  # all 3 frames are deferred
+    assert not rx_fifo and not sent and net_obj.tx_queue_depth == 3
+
+    # a frame for this node is read although the queue can't be drained in time
+    frame = RF24NetworkFrame(RF24NetworkHeader(0o1, 2), b"\x09")
+    frame.header.from_node = 0
+    rx_fifo.append(bytearray(frame.pack()))
+    net_obj.update(max_time_us=500)
+    assert not rx_fifo and net_obj.available() and len(sent) == 1
+    assert net_obj.read().message == b"\x09"
+    for _ in range(2):  # each call sends at least the head of the queue
+        net_obj.update(max_time_us=500)
+    assert not net_obj.tx_queue_depth
+    assert [buf[-1] for buf in sent] == [0, 1, 2]
+    assert not net_obj.update(max_time_us=500)
+
+
+def test_update_budget_net_ack(net_obj: RF24Network, monkeypatch: pytest.MonkeyPatch):
+    """test waiting for a NETWORK_ACK does not outlast a limited update()"""
+    net_obj.node_address = 0o1
+    net_obj.route_timeout = 200
+    monkeypatch.setattr(net_obj._rf24, "read", lambda: None)
+    monkeypatch.setattr(net_obj._rf24, "send", lambda *args, **kwargs: True)
+    assert net_obj.send(RF24NetworkHeader(0o2, 65), b"x", priority=0)
+    start = time.monotonic_ns()
+    net_obj.update(max_time_us=500)
+    assert time.monotonic_ns() - start <= 500000 + 20000000  # 20 ms of slack
+    assert not net_obj.tx_queue_depth
+
+
+def test_tx_queue_net_ack(net_obj: RF24Network, monkeypatch: pytest.MonkeyPatch):
+    """test queued frames never wait for a NETWORK_ACK during update()"""
+    net_obj.node_address = 0o1
+    net_obj.max_pending_acks = 1
+    rx_fifo, sent = ([], [])
+    monkeypatch.setattr(
+        net_obj._rf24, "read", lambda: rx_fifo.pop(0) if rx_fifo else None
+    )
+    monkeypatch.setattr(
+        net_obj._rf24, "send", lambda buf, *args, **kwargs: sent.append(buf) or True
+    )
+    delivered = []
+    assert net_obj.send(RF24NetworkHeader(0o2, 65), b"x", priority=0)
+    assert net_obj.send(
+        RF24NetworkHeader(0o3, 65),
+        b"y",
+        on_ack=lambda *args: delivered.append(args),
+        priority=0,
+    )
+    start = time.monotonic_ns()
+    assert net_obj.update(max_time_us=500) == NETWORK_OVERRUN  # 2nd frame is held
+    assert time.monotonic_ns() - start <= 500000 + 20000000  # 20 ms of slack
+    assert len(sent) == 1 and net_obj.pending_acks == 1
+    assert net_obj.tx_queue_depth == 1
+
+    ack = RF24NetworkFrame(RF24NetworkHeader())
+    ack.header.unpack(sent[0])  # the NETWORK_ACK of the 1st frame
+    ack.header.to_node, ack.header.from_node = (0o1, 0o2)
+    ack.header.message_type = NETWORK_ACK
+    rx_fifo.append(bytearray(ack.pack()))
+    net_obj.update(max_time_us=500)  # resolves the 1st frame
+    assert len(sent) == 1 and not net_obj.pending_acks
+    net_obj.update(max_time_us=500)
+    assert len(sent) == 2 and sent[1][-1:] == b"y" and net_obj.pending_acks == 1
+    assert not net_obj.tx_queue_depth and not delivered
+
+
+def test_tx_queue(net_obj: RF24Network, monkeypatch: pytest.MonkeyPatch):
+    """test the outbound queue's priorities, fairness, and drop policy"""
+    sent = []
+    monkeypatch.setattr(
+        net_obj._rf24, "send", lambda buf, *args, **kwargs: sent.append(buf) or True
+    )
+    for to_node, msg, priority in ((0o1, 0, 2), (0o1, 1, 2), (0o2, 2, 2), (0o3, 3, 0)):
+        assert net_obj.send(RF24NetworkHeader(to_node, 1), bytes([msg]), None, priority)
+    assert net_obj.tx_queue_depth == 4 and not sent
+    net_obj.update()
+    assert not net_obj.tx_queue_depth
+    assert [buf[-1] for buf in sent] == [3, 0, 2, 1]
+
+    # when full, only frames of a lower priority are dropped to make room
+    dropped = []
+    net_obj.max_tx_queue = 1
+    low, header = (RF24NetworkHeader(0o1, 1), RF24NetworkHeader(0o2, 1))
+    assert net_obj.send(low, b"\x04", lambda *args: dropped.append(args), 2)
+    assert net_obj.send(header, b"\x05", lambda *args: dropped.append(args), 1)
+    assert net_obj.tx_queue_depth == 1 and net_obj.tx_dropped == 1
+    assert not net_obj.send(header, b"\x06", lambda *args: dropped.append(args), 1)
+    assert net_obj.tx_dropped == 2
+    assert dropped == [(0o1, low.frame_id, False), (0o2, header.frame_id, False)]
+    with pytest.raises(ValueError):
+        net_obj.send(header, b"", priority=3)
+
+
+def test_coalesce(net_obj: RF24Network, monkeypatch: pytest.MonkeyPatch):
+    """test combining small messages into NETWORK_COALESCED frames"""
+    sent: list = []
+    monkeypatch.setattr(
+        net_obj._rf24, "send", lambda buf, *args, **kwargs: sent.append(buf) or True
+    )
+    net_obj.coalesce_timeout = 5
+    headers = [RF24NetworkHeader(0o1, i + 1) for i in range(5)]
+    for i, header in enumerate(headers):
+        assert net_obj.send(header, bytes([i] * 4))
+    assert len(sent) == 1  # the first 4 messages filled a frame
+    frame = RF24NetworkFrame()
+    frame.unpack(sent[0])
+    assert frame.header.message_type == NETWORK_COALESCED and len(frame.message) == 24
+    time.sleep(0.005)
+    net_obj.update()  # the last message is sent alone when its timeout expires
+    assert len(sent) == 2 and sent[1][8:] == bytes([4] * 4) and sent[1][6] == 5
+
+    # a failed transmission of held messages is counted
+    with monkeypatch.context() as patch:
+        patch.setattr(net_obj, "_write", lambda *args: False)
+        assert net_obj.send(RF24NetworkHeader(0o2, 1), b"\x07")  # only held
+        assert not net_obj.coalesce_failures
+        time.sleep(0.005)
+        net_obj.update()
+        assert net_obj.coalesce_failures == 1 and not net_obj._coalesced
+
+    # a message that can't be combined is sent after the messages held for its node
+    sent.clear()
+    assert net_obj.send(RF24NetworkHeader(0o1, 1), b"first")
+    assert net_obj.send(RF24NetworkHeader(0o1, 1), b"second-message-is-23-bb")
+    assert [buf[8:] for buf in sent] == [b"first", b"second-message-is-23-bb"]
+    assert not net_obj._coalesced
+
+    # unpack the combined frame as if it was received
+    frame.header.to_node, frame.header.from_node = (0, 0o1)
+    rx_fifo = [bytearray(frame.pack())]
+    monkeypatch.setattr(
+        net_obj._rf24, "read", lambda: rx_fifo.pop() if rx_fifo else None
+    )
+    assert net_obj.update() == 4
+    for i in range(4):
+        received = net_obj.read()
+        assert received is not None and received.message == bytes([i] * 4)
+        assert received.header.message_type == i + 1
+        assert received.header.frame_id == headers[0].frame_id + i
+    assert not net_obj.available()
+
+
+def test_multicast_duplicates(net_obj: RF24Network, monkeypatch: pytest.MonkeyPatch):
+    """test duplicate suppression & scheduled relaying of multicast frames"""
+    net_obj.node_address = 0o1
+    net_obj.multicast_relay = True
+    sent, rx_fifo = ([], [])
+    monkeypatch.setattr(
+        net_obj._rf24, "send", lambda buf, *args, **kwargs: sent.append(buf) or True
+    )
+    monkeypatch.setattr(
+        net_obj._rf24, "read", lambda: rx_fifo.pop(0) if rx_fifo else None
+    )
+    frame = RF24NetworkFrame(RF24NetworkHeader(NETWORK_MULTICAST_ADDR, 1), b"hi")
+    frame.header.from_node = 0
+    rx_fifo.extend([bytearray(frame.pack())] * 3)  # 2 duplicates from other relays
+    net_obj.update()
+    assert len(net_obj.queue) == 1 and not sent  # the relay is delayed
+    time.sleep(0.004)
+    net_obj.update()
+    assert len(sent) == 1 and sent[0][8:] == b"hi"
+
+    net_obj.multicast_ttl = 0  # disable duplicate suppression
+    rx_fifo.append(bytearray(frame.pack()))
+    net_obj.update()
+    assert len(net_obj.queue) == 1  # FrameQueue also rejects a queued duplicate
+    net_obj.read()
+    rx_fifo.append(bytearray(frame.pack()))
+    net_obj.update()
+    assert len(net_obj.queue) == 1
+
+
+def test_scheduled_last_hop(net_obj: RF24Network, monkeypatch: pytest.MonkeyPatch):
+    """test the non-blocking delay before delivering a frame that invokes an ACK"""
+    net_obj.node_address = 0o1
+    sent, rx_fifo = ([], [])
+    monkeypatch.setattr(
+        net_obj._rf24, "send", lambda buf, *args, **kwargs: sent.append(buf) or True
+    )
+    monkeypatch.setattr(
+        net_obj._rf24, "read", lambda: rx_fifo.pop(0) if rx_fifo else None
+    )
+    frame = RF24NetworkFrame(RF24NetworkHeader(0o11, 65), b"hi")
+    frame.header.from_node = 0
+    rx_fifo.append(bytearray(frame.pack()))
+    net_obj.update()
+    assert not sent and len(net_obj._tx_scheduled) == 1
+    time.sleep(0.003)
+    net_obj.update()
+    header = RF24NetworkHeader()
+    assert len(sent) == 2 and sent[0] == frame.pack()
+    assert header.unpack(sent[1]) and header.message_type == NETWORK_ACK
+    assert header.to_node == 0 and header.frame_id == frame.header.frame_id
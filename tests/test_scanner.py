@@ -0,0 +1,59 @@
+"""Test functions related to the ChannelScanner class."""
+
+import pytest
+from circuitpython_nrf24l01.rf24 import RF24
+from circuitpython_nrf24l01.scanner import ChannelScanner
+
+
+@pytest.mark.parametrize(
+    "channels",
+    [None, [2, 40, 80], pytest.param([126], marks=pytest.mark.xfail)],
+    ids=["all", "some", "invalid"],
+)
+def test_sweep(rf24_obj: RF24, channels):
+    """test sweep() and the accumulated counts"""
+    state = rf24_obj._spi._spi.state
+    state.registers[9][0] = 0
+    rf24_obj.channel = 76
+    scanner = ChannelScanner(rf24_obj, channels)
+    assert scanner.sweep() == 0
+    state.registers[9][0] = 1  # pretend a signal is detected on every channel
+    try:
+        assert scanner.sweep() == len(scanner.channels)
+    finally:
+        state.registers[9][0] = 0
+    assert scanner.sweeps == 2
+    for ch in range(126):
+        assert scanner.counts[ch] == (ch in scanner.channels)
+        assert scanner.histogram()[ch] == (ch in scanner.channels) / 2
+    assert not rf24_obj.listen and rf24_obj.channel == 76
+    scanner.reset()
+    assert not scanner.sweeps and not any(scanner.counts)
+
+
+@pytest.mark.parametrize(
+    "channels", [[], [2, 2], [-1]], ids=["empty", "duplicate", "negative"]
+)
+def test_invalid_channels(rf24_obj: RF24, channels):
+    """test that an unusable channels sequence is rejected"""
+    with pytest.raises(ValueError):
+        ChannelScanner(rf24_obj, channels)
+
+
+def test_scan(rf24_obj: RF24):
+    """test scan() and quietest()"""
+    state = rf24_obj._spi._spi.state
+    scanner = ChannelScanner(rf24_obj, [10, 20, 30])
+    registers = rf24_obj._reg_read
+
+    def rpd_on_channel_20(reg, command=False):
+        """Fake a signal on channel 20 only."""
+        if reg == 9:
+            return int(state.registers[5][0] == 20)
+        return registers(reg, command)
+
+    rf24_obj._reg_read = rpd_on_channel_20  # type: ignore[method-assign]
+    histogram = scanner.scan(timeout=10, max_sweeps=3)
+    assert scanner.sweeps == 3
+    assert [histogram[ch] for ch in (10, 20, 30)] == [0, 1, 0]
+    assert scanner.quietest(2) == [10, 30]
@@ -1,6 +1,10 @@
 """Simple tests for Network data structures."""
 
+import builtins
+import io
 import struct
+import time
+from pathlib import Path
 from typing import Union, Optional, List
 import pytest
 from circuitpython_nrf24l01.fake_ble import (
@@ -15,12 +19,15 @@ from circuitpython_nrf24l01.fake_ble import (
     TEMPERATURE_UUID,
     EDDYSTONE_UUID,
 )
+from circuitpython_nrf24l01.network import structs
 from circuitpython_nrf24l01.network.structs import (
     is_address_valid,
     RF24NetworkHeader,
     RF24NetworkFrame,
     FrameQueue,
     FrameQueueFrag,
+    DhcpTable,
+    MappedDhcpTable,
 )
 from circuitpython_nrf24l01.network.constants import (
     MSG_FRAG_FIRST,
@@ -164,3 +171,161 @@ def test_queue_element(ble_obj: FakeBLE, dev_name: Optional[bytes]):
         for chunk_d in queue.data:
             if isinstance(chunk_d, ServiceData):
                 assert chunk_d.data == data.data
+
+
+def _make_frag(from_node: int, frame_id: int, msg_t: int, reserved: int, msg: bytes):
+    """create a fragment frame for the de-fragmenting Frame Queue tests"""
+    frame = RF24NetworkFrame(RF24NetworkHeader(0, msg_t), msg)
+    frame.header.from_node = from_node
+    frame.header.frame_id = frame_id
+    frame.header.reserved = reserved
+    return frame
+
+
+def test_frag_queue_interleaved():
+    """test de-fragmenting interleaved messages from different nodes"""
+    queue = FrameQueueFrag()
+    assert queue.enqueue(_make_frag(1, 7, MSG_FRAG_FIRST, 2, b"a1"))
+    assert queue.enqueue(_make_frag(2, 7, MSG_FRAG_FIRST, 2, b"b1"))
+    assert queue.enqueue(_make_frag(1, 7, MSG_FRAG_MORE, 1, b"a2"))
+    assert queue.enqueue(_make_frag(2, 7, MSG_FRAG_MORE, 1, b"b2"))
+    assert queue.enqueue(_make_frag(2, 7, MSG_FRAG_LAST, 65, b"b3"))
+    assert queue.enqueue(_make_frag(1, 7, MSG_FRAG_LAST, 66, b"a3"))
+    frame = queue.dequeue()
+    assert frame is not None and frame.message == b"b1b2b3"
+    assert frame.header.message_type == 65 and frame.header.from_node == 2
+    frame = queue.dequeue()
+    assert frame is not None and frame.message == b"a1a2a3"
+    assert frame.header.message_type == 66 and frame.header.from_node == 1
+
+
+def test_frag_queue_limits():
+    """test eviction and memory caps of the de-fragmenting Frame Queue"""
+    queue = FrameQueueFrag(max_message_length=4)
+    queue.max_frag_streams = 1
+    assert queue.max_frag_streams == 1
+    # overflow the preallocated buffer
+    assert queue.enqueue(_make_frag(1, 1, MSG_FRAG_FIRST, 2, b"abc"))
+    assert not queue.enqueue(_make_frag(1, 1, MSG_FRAG_MORE, 1, b"de"))
+    # a new message evicts the stalest message when all slots are occupied
+    assert queue.enqueue(_make_frag(1, 2, MSG_FRAG_FIRST, 1, b"ab"))
+    assert queue.enqueue(_make_frag(2, 2, MSG_FRAG_FIRST, 1, b"cd"))
+    assert not queue.enqueue(_make_frag(1, 2, MSG_FRAG_LAST, 65, b"ef"))
+    # incomplete messages expire
+    queue.frag_timeout = 0
+    assert not queue.enqueue(_make_frag(2, 2, MSG_FRAG_LAST, 65, b"ef"))
+    assert not len(queue)
+
+
+def test_dhcp_table():
+    """test DhcpTable's two-way index and dict-like behavior"""
+    table = DhcpTable({2: 0o5, 3: 0o14})
+    assert table == {2: 0o5, 3: 0o14} and len(table) == 2
+    assert table.get_address(3) == 0o14 and table.get_node_id(0o14) == 3
+    assert table.get_address(4) == -2 and table.get_node_id(0o4) == -2
+    table[4] = 0o5  # takes the address from node 2
+    assert 2 not in table and table.get_node_id(0o5) == 4
+    table[4] = 0o24  # frees the old address
+    assert table.get_node_id(0o5) == -2
+    assert table.items() == [(3, 0o14), (4, 0o24)]
+    assert list(table) == [3, 4] and table.values() == [0o14, 0o24]
+    assert table.release(0o14) and not table.release(0o14)
+    assert table.pop(4) == 0o24 and table.pop(4, None) is None
+    with pytest.raises(KeyError):
+        del table[4]
+    with pytest.raises(ValueError):
+        table[256] = 1
+    table.update({1: 1, "2": 2})
+    assert table.get(2) == 2 and table.get(5, -1) == -1
+    table.clear()
+    assert not table and table.get_node_id(1) == -2
+
+
+def test_dhcp_allocate():
+    """test DhcpTable.allocate() picks free child slots per parent"""
+    table = DhcpTable()
+    assert [table.allocate(n_id, 0, 5) for n_id in range(1, 6)] == [5, 4, 3, 2, 1]
+    assert table.allocate(6, 0, 5) == -1  # master's children are all assigned
+    assert table.allocate(3, 0, 5) == 3  # a node keeps its current child address
+    assert table.release(4) and table.allocate(6, 0, 5) == 4
+    assert table.allocate(7, 0o5, 4) == 0o45
+    assert table.allocate(7, 0o5, 4) == 0o45
+    # the default address is never allocated
+    table.assign(8, 0o1444)
+    assert table.allocate(9, 0o444, 4) == 0o3444
+    assert table.allocate(10, 0o1111, 4) == -1  # would exceed 4 levels
+
+
+def test_dhcp_leases(monkeypatch: pytest.MonkeyPatch):
+    """test DhcpTable lease renewal and expiry"""
+    clock = [100.0]
+    monkeypatch.setattr(time, "monotonic", lambda: clock[0])
+    table = DhcpTable({1: 0o1, 2: 0o2})
+    assert not table.expire()  # leases are disabled by default
+    table.lease_time = 10
+    table[3] = 0o3
+    clock[0] = 105
+    table.touch(0o2)
+    table.touch(0o4)  # not assigned
+    clock[0] = 110
+    assert sorted(table.expire()) == [0o1, 0o3]
+    assert table == {2: 0o2}
+    clock[0] = 114
+    assert not table.expire()  # 0o2 was renewed
+    table.release(0o2)
+    table[2] = 0o5  # re-assigned before the old lease was dequeued
+    clock[0] = 115
+    assert not table.expire()
+    clock[0] = 124
+    assert table.expire() == [0o5] and not table
+
+
+def test_mapped_dhcp_table(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """test DhcpTable stored in a memory-mapped file"""
+    filename = str(tmp_path / "dhcp.map")
+    monkeypatch.setattr(time, "time", lambda: 1000.0)
+    table = MappedDhcpTable(filename)
+    assert not table and (tmp_path / "dhcp.map").stat().st_size == 8 + 256 * 6
+    table.update({2: 0o5, 3: 0o4})
+    reader = MappedDhcpTable(filename)  # changes are shared without saving
+    assert reader == {2: 0o5, 3: 0o4}
+    assert reader.allocate(4, 0, 5) == 0o3  # child slots were indexed
+    table.release(0o5)
+    table.flush()
+    data = (tmp_path / "dhcp.map").read_bytes()
+    assert data[:8] == b"DHCM" + struct.pack("=HH", 1, 0)
+    assert data[8 + 3 * 2 : 8 + 5 * 2] == struct.pack("=HH", 0o4, 0o3)
+    assert data[8 + 512 + 3 * 4 : 8 + 512 + 4 * 4] == struct.pack("=I", 1000)
+    reader.close()
+    assert reader == {3: 0o4, 4: 0o3}  # still usable after closing
+    table.close()
+    table.close()
+    monkeypatch.setattr(time, "time", lambda: 1015.0)
+    table = MappedDhcpTable(filename)
+    table.lease_time = 10  # the last seen times were kept
+    assert sorted(table.expire()) == [0o3, 0o4]
+    table.close()
+    files = []
+
+    def fail(*args):
+        raise OSError("can't map the file")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(
+            builtins, "open", lambda *args: files.append(io.open(*args)) or files[-1]
+        )
+        patch.setattr(structs.mmap, "mmap", fail)
+        with pytest.raises(OSError):
+            MappedDhcpTable(filename)
+    assert files and all(file.closed for file in files)  # not leaked
+    with open(filename, "r+b") as file:
+        file.write(b"DHCM" + struct.pack("=H", 1)[::-1])  # the other byte order
+    with pytest.raises(ValueError):
+        MappedDhcpTable(filename)
+    with open(filename, "r+b") as file:
+        file.write(b"JUNK")
+    with pytest.raises(ValueError):
+        MappedDhcpTable(filename)
+    monkeypatch.setattr(structs, "mmap", None)
+    with pytest.raises(RuntimeError):
+        MappedDhcpTable(filename)